@@ -1,20 +1,32 @@
+import os
+
 from flask import Flask
 from flask_login import LoginManager
 from flask_migrate import Migrate
 from flask_sqlalchemy import SQLAlchemy
+from jinja2 import FileSystemBytecodeCache
 
 from config import Config
-from delta_api import DeltaAPI
+from delta_api import DeltaAPI, InstructorIndex, Scheduler, SQLiteCache
 
 db = SQLAlchemy()
 migrate = Migrate()
 login = LoginManager()
 login.login_view = 'main.login'
 delta_api = DeltaAPI()
+instructor_index = InstructorIndex()
 
-def create_app():
+def create_app(config_class=Config):
     app = Flask(__name__)
-    app.config.from_object(Config)
+    app.config.from_object(config_class)
+
+    bytecode_dir = app.config.get('JINJA_BYTECODE_CACHE_DIR', os.path.join(app.instance_path, 'jinja'))
+    if bytecode_dir:
+        os.makedirs(bytecode_dir, exist_ok=True)
+        app.jinja_env.bytecode_cache = FileSystemBytecodeCache(bytecode_dir)
+
+    from app.fragments import render_section
+    app.jinja_env.globals['render_section'] = render_section
 
     db.init_app(app)
     migrate.init_app(app, db)
@@ -22,6 +34,71 @@ def create_app():
 
     from app.main import bp as main_bp
     app.register_blueprint(main_bp)
+
+    from app.cli import bp as cli_bp
+    app.register_blueprint(cli_bp)
+
+    from app.live import seat_feed
+    seat_feed.interval = app.config.get('SEAT_POLL_INTERVAL', seat_feed.interval)
+    seat_feed.heartbeat = app.config.get('SEAT_HEARTBEAT_INTERVAL', seat_feed.heartbeat)
+    seat_feed.max_feeds = app.config.get('SEAT_MAX_FEEDS', seat_feed.max_feeds)
+    # each open /live stream holds a worker thread; keep this below the threads per worker
+    seat_feed.max_subscribers = app.config.get('SEAT_MAX_SUBSCRIBERS', seat_feed.max_subscribers)
+
+    from app.snapshots import snapshot_refresher
+    snapshot_refresher.interval = app.config.get('SNAPSHOT_REFRESH_INTERVAL', snapshot_refresher.interval)
+    snapshot_refresher.max_age = app.config.get('SNAPSHOT_MAX_AGE', snapshot_refresher.max_age)
+    snapshot_refresher.gone_max_age = app.config.get('SNAPSHOT_GONE_MAX_AGE', snapshot_refresher.gone_max_age)
+    if snapshot_refresher.interval:
+        app.before_request(lambda: snapshot_refresher.ensure_started(app))
+
+    cache_path = app.config.get('DELTA_CACHE_PATH')
+    if cache_path:
+        delta_api.cache = SQLiteCache(
+            cache_path,
+            ttls=app.config.get('DELTA_CACHE_TTLS'),
+            max_bytes=app.config.get('DELTA_CACHE_MAX_BYTES', 64 * 1024 * 1024)
+        )
+
+    delta_api.max_workers = app.config.get('UPSTREAM_WORKERS', delta_api.max_workers)
+
+    upstream_rate = app.config.get('UPSTREAM_RATE')
+    if upstream_rate:
+        delta_api.limiter = Scheduler(
+            rate=upstream_rate,
+            burst=app.config.get('UPSTREAM_BURST', upstream_rate),
+            budgets=app.config.get('UPSTREAM_LANE_BUDGETS'),
+            max_queue=app.config.get('UPSTREAM_LANE_QUEUE_LIMITS')
+        )
+
+    from app.profiling import request_profiler
+    request_profiler.init_app(app)
+
+    index_path = app.config.get('INSTRUCTOR_INDEX_PATH')
+    if index_path:
+        instructor_index.path = index_path
+        instructor_index.reload_if_changed()
+
+        @app.before_request
+        def reload_instructor_index():
+            # `flask instructors build/refresh` save to the same file; every worker picks it up on its next request
+            instructor_index.reload_if_changed()
+
+    from app.warmup import serving, warmup
+    warmup.interval = app.config.get('WARMUP_REFRESH_INTERVAL', 0)
+    warmup.top_searches = app.config.get('WARMUP_TOP_SEARCHES', warmup.top_searches)
+    warmup.top_courses = app.config.get('WARMUP_TOP_COURSES', warmup.top_courses)
+    if app.config.get('WARMUP_ON_START') and serving():
+        try:
+            warmup.run_once(app)
+        except Exception as e:
+            print(f"Error warming up: {e}")
+        # a preloading server forks workers after this; don't hand them our connections
+        with app.app_context():
+            db.engine.dispose()
+    if warmup.interval:
+        warmup.check_interval()
+        app.before_request(lambda: warmup.ensure_started(app))
     
     return app
 
@@ -0,0 +1,46 @@
+import os
+import threading
+
+
+class BackgroundTask:
+    """
+    Periodic job on a daemon thread, started lazily in whichever process first
+    needs it. Threads do not survive fork(), so a worker forked from a preloaded
+    parent starts its own copy on first use instead of inheriting a dead one.
+    """
+    def __init__(self, interval: float):
+        self.interval = interval
+        self._pid = None
+        self._thread = None
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+
+    def __repr__(self):
+        return '<{} every {}s>'.format(type(self).__name__, self.interval)
+
+    def run_once(self, app):
+        raise NotImplementedError
+
+    def ensure_started(self, app):
+        if self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            self._wake = threading.Event()
+            self._thread = threading.Thread(target=self._loop, args=(app,), daemon=True)
+            self._thread.start()
+            self._pid = os.getpid()
+
+    def wake(self):
+        """ Run the job now instead of waiting out the interval """
+        self._wake.set()
+
+    def _loop(self, app):
+        while True:
+            try:
+                self.run_once(app)
+            except Exception as e:
+                print(f"Error in {self!r}: {e}")
+            self._wake.wait(self.interval)
+            self._wake.clear()
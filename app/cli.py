@@ -0,0 +1,65 @@
+import os
+
+import click
+from flask import Blueprint, current_app
+
+from app import delta_api, instructor_index
+from delta_api import BACKGROUND, lane
+from delta_api.models import Course
+
+bp = Blueprint('cli', __name__, cli_group=None)
+
+
+@bp.cli.group()
+def instructors():
+    """Instructor index commands."""
+    pass
+
+@instructors.command()
+@click.option('--path', default=None, help='Where to write the index (defaults to INSTRUCTOR_INDEX_PATH).')
+def build(path):
+    """Crawl every section of the current term and save the instructor index."""
+    path = path or current_app.config.get('INSTRUCTOR_INDEX_PATH')
+    if not path:
+        raise click.UsageError('Set INSTRUCTOR_INDEX_PATH or pass --path.')
+    with lane(BACKGROUND):
+        try:
+            instructor_index.build(delta_api)
+        except Exception as e:
+            raise click.ClickException('Could not list the term\'s courses, index left unchanged: {}'.format(e))
+    instructor_index.save(path)
+    click.echo('Indexed {} instructors for {}'.format(len(instructor_index), instructor_index.term))
+    report_failed()
+
+@instructors.command()
+@click.argument('course_ids', nargs=-1, required=True)
+@click.option('--path', default=None, help='Index to update (defaults to INSTRUCTOR_INDEX_PATH).')
+def refresh(course_ids, path):
+    """Re-crawl the given courses and save the index; running servers reload it."""
+    path = path or current_app.config.get('INSTRUCTOR_INDEX_PATH')
+    if not path:
+        raise click.UsageError('Set INSTRUCTOR_INDEX_PATH or pass --path.')
+    if os.path.exists(path):
+        instructor_index.load(path)
+    courses = []
+    with lane(BACKGROUND):
+        for course_id in course_ids:
+            course = instructor_index.course(course_id)
+            if course is None:
+                # not indexed yet; the course name is all the crawl needs
+                name = delta_api.get_course_name(course_id)
+                if name is None:
+                    click.echo('Unknown course {}'.format(course_id), err=True)
+                    continue
+                subject_id, _, course_number = name.partition(' ')
+                course = Course(id=course_id, subject_id=subject_id, course_number=course_number, title='')
+            courses.append(course)
+        instructor_index.refresh(delta_api, courses)
+    instructor_index.save(path)
+    click.echo('Refreshed {} courses, {} instructors indexed'.format(len(courses) - len(instructor_index.failed), len(instructor_index)))
+    report_failed()
+
+def report_failed():
+    if instructor_index.failed:
+        click.echo('Skipped {} courses that failed to fetch: {}'.format(
+            len(instructor_index.failed), ', '.join(course.id for course in instructor_index.failed)), err=True)
@@ -0,0 +1,15 @@
+from functools import wraps
+
+from flask import abort, current_app
+from flask_login import current_user, login_required
+
+
+def admin_required(view):
+    """ Like login_required, but the user's email must also be listed in ADMINS """
+    @wraps(view)
+    @login_required
+    def wrapper(*args, **kwargs):
+        if current_user.email not in current_app.config.get('ADMINS', []):
+            abort(403)
+        return view(*args, **kwargs)
+    return wrapper
@@ -0,0 +1,51 @@
+import threading
+from collections import OrderedDict
+
+from flask import current_app
+from markupsafe import Markup
+
+
+class FragmentCache:
+    """ Thread-safe LRU of rendered template fragments """
+    def __init__(self, maxsize=4096):
+        self.maxsize = maxsize
+        self._lock = threading.Lock()
+        self._fragments = OrderedDict()
+
+    def __len__(self):
+        return len(self._fragments)
+
+    def get_or_render(self, key, render) -> Markup:
+        with self._lock:
+            fragment = self._fragments.get(key)
+            if fragment is not None:
+                self._fragments.move_to_end(key)
+                return fragment
+        fragment = render()
+        with self._lock:
+            self._fragments[key] = fragment
+            if len(self._fragments) > self.maxsize:
+                self._fragments.popitem(last=False)
+        return fragment
+
+    def clear(self):
+        with self._lock:
+            self._fragments.clear()
+
+section_fragments = FragmentCache()
+
+
+def render_section(section) -> Markup:
+    # a row only changes when its seats (or assigned instructor) do
+    key = (
+        section.id,
+        section.course_id,
+        section.course_name,
+        section.open_seats,
+        section.total_seats,
+        section.instructors[0] if section.instructors else None,
+    )
+    return section_fragments.get_or_render(
+        key,
+        lambda: Markup(current_app.jinja_env.get_template('_section.html').render(section=section))
+    )
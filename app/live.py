@@ -0,0 +1,146 @@
+import json
+import queue
+import threading
+import time
+from typing import Dict, Iterator, Optional, Set, Tuple
+
+from app import db, delta_api, seat_history
+from delta_api import BACKGROUND, lane
+
+
+class TooManyFeeds(Exception):
+    pass
+
+
+class SeatFeed:
+    """
+    Per-process registry of browsers watching seat counts. Each watched course
+    or section gets one background poller whose changes are fanned out to every
+    subscriber's bounded queue, so viewers never trigger upstream calls themselves.
+    Polls bypass the response cache so pushed counts are at most one interval
+    old, and distinct feeds are capped since each costs a call per interval.
+
+    Each subscriber holds its request open for as long as the page is, so the
+    endpoint needs threaded or async workers (e.g. gunicorn --threads or
+    gevent); on sync workers every viewer takes a whole worker. Subscribers are
+    capped per process at max_subscribers so viewers can't take every thread.
+    """
+    def __init__(self, interval=15.0, heartbeat=15.0, queue_size=16, max_feeds=100, max_subscribers=200):
+        self.interval = interval
+        self.heartbeat = heartbeat
+        self.queue_size = queue_size
+        self.max_feeds = max_feeds
+        self.max_subscribers = max_subscribers
+        self._lock = threading.Lock()
+        self._subscribers: Dict[Tuple, Set[queue.Queue]] = {}
+        self._pollers: Dict[Tuple, threading.Thread] = {}
+        self._latest: Dict[Tuple, dict] = {}
+
+    def __repr__(self):
+        return '<SeatFeed {} feeds>'.format(len(self._subscribers))
+
+    def subscriber_count(self, key: Optional[Tuple]=None) -> int:
+        with self._lock:
+            if key is not None:
+                return len(self._subscribers.get(key, ()))
+            return sum(len(subscribers) for subscribers in self._subscribers.values())
+
+    def exists(self, key: Tuple) -> bool:
+        """ Whether the course or section is real, checked before a new feed starts polling it """
+        if key[0] == 'course':
+            return delta_api.get_course_name(key[1]) is not None
+        return delta_api.get_section(key[1], key[2], course_name='') is not None
+
+    def subscribe(self, app, key: Tuple) -> queue.Queue:
+        q = queue.Queue(maxsize=self.queue_size)
+        with self._lock:
+            if key not in self._subscribers and len(self._subscribers) >= self.max_feeds:
+                raise TooManyFeeds('Already polling {} feeds'.format(len(self._subscribers)))
+            subscribers = sum(len(queues) for queues in self._subscribers.values())
+            if subscribers >= self.max_subscribers:
+                raise TooManyFeeds('Already streaming to {} subscribers'.format(subscribers))
+            self._subscribers.setdefault(key, set()).add(q)
+            if key in self._latest:
+                q.put_nowait(self._latest[key])
+            poller = self._pollers.get(key)
+            if poller is None or not poller.is_alive():
+                poller = threading.Thread(target=self._poll, args=(app, key), daemon=True)
+                self._pollers[key] = poller
+                poller.start()
+        return q
+
+    def unsubscribe(self, key: Tuple, q: queue.Queue):
+        with self._lock:
+            subscribers = self._subscribers.get(key)
+            if subscribers is not None:
+                subscribers.discard(q)
+                if not subscribers:
+                    del self._subscribers[key]
+
+    def _fetch(self, key: Tuple) -> dict:
+        # course_name is only used for display; skip the extra lookup
+        if key[0] == 'course':
+            sections = delta_api.get_sections(key[1], course_name='')
+        else:
+            section = delta_api.get_section(key[1], key[2], course_name='')
+            sections = [section] if section is not None else []
+        return {
+            section.id: {'open_seats': section.open_seats, 'total_seats': section.total_seats}
+            for section in sections
+        }
+
+    def _poll(self, app, key: Tuple):
+        while True:
+            with self._lock:
+                if not self._subscribers.get(key):
+                    # last viewer left; forget the key so the next viewer starts a fresh poller
+                    self._pollers.pop(key, None)
+                    self._latest.pop(key, None)
+                    return
+            try:
+                with app.app_context(), lane(BACKGROUND), delta_api.fresh():
+                    seats = self._fetch(key)
+                    now = int(time.time())
+                    for section_id, counts in seats.items():
+                        seat_history.record(section_id, counts['open_seats'], now)
+                    db.session.commit()
+                self._publish(key, seats)
+            except Exception as e:
+                print(f"Error polling seats for {key}: {e}")
+            time.sleep(self.interval)
+
+    def _publish(self, key: Tuple, seats: dict):
+        with self._lock:
+            if self._latest.get(key) == seats:
+                return
+            self._latest[key] = seats
+            subscribers = list(self._subscribers.get(key, ()))
+        for q in subscribers:
+            try:
+                q.put_nowait(seats)
+            except queue.Full:
+                # a slow client only ever needs the newest counts
+                try:
+                    q.get_nowait()
+                except queue.Empty:
+                    pass
+                try:
+                    q.put_nowait(seats)
+                except queue.Full:
+                    pass
+
+    def stream(self, key: Tuple, q: queue.Queue) -> Iterator[str]:
+        """ Server-Sent Events for one subscriber; unsubscribes when the client goes away """
+        try:
+            yield 'retry: {}\n\n'.format(int(self.interval * 1000))
+            while True:
+                try:
+                    seats = q.get(timeout=self.heartbeat)
+                except queue.Empty:
+                    yield ': heartbeat\n\n'
+                    continue
+                yield 'event: seats\ndata: {}\n\n'.format(json.dumps(seats))
+        finally:
+            self.unsubscribe(key, q)
+
+seat_feed = SeatFeed()
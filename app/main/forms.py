@@ -33,4 +33,7 @@ class RegistrationForm(FlaskForm):
 
 class CourseSearchForm(FlaskForm):
     query = StringField('Search', validators=[DataRequired()])
+    submit = SubmitField('Submit')
+
+class EmptyForm(FlaskForm):
     submit = SubmitField('Submit')
\ No newline at end of file
@@ -1,12 +1,51 @@
+from urllib.parse import urlsplit
+
 import sqlalchemy as sa
-from flask import flash, redirect, render_template, url_for
+from flask import (Response, abort, current_app, flash, jsonify, redirect,
+                   render_template, request, send_from_directory,
+                   stream_template, url_for)
 from flask_login import current_user, login_required, login_user, logout_user
 
-from app import db, delta_api
+from app import db, delta_api, instructor_index, seat_history
 from app.main import bp
-from app.main.forms import CourseSearchForm, LoginForm, RegistrationForm
-from app.models import User
+from app.decorators import admin_required
+from app.live import TooManyFeeds, seat_feed
+from app.main.forms import (CourseSearchForm, EmptyForm, LoginForm,
+                            RegistrationForm)
+from app.models import Search, Section, User
+from app.profiling import request_profiler
+from app.snapshots import snapshot_refresher
+from delta_api import SchedulerFull
+
+
+UPSTREAM_BUSY = 'Too many requests are waiting on the course catalog, try again shortly.'
+
+@bp.app_errorhandler(SchedulerFull)
+def upstream_busy(error):
+    return UPSTREAM_BUSY, 503
 
+class StreamGuard:
+    """
+    Streamed pages have already sent a 200 by the time their upstream calls
+    run, so the 503 handler can't fire. Calls made through the guard turn
+    SchedulerFull into a flag the template shows instead.
+    """
+    def __init__(self):
+        self.busy = False
+        self.message = UPSTREAM_BUSY
+
+    def call(self, fn, *args, **kwargs):
+        try:
+            return fn(*args, **kwargs)
+        except SchedulerFull:
+            self.busy = True
+            return None
+
+    def iterate(self, iterable):
+        try:
+            yield from iterable
+        except SchedulerFull:
+            self.busy = True
 
 @bp.route('/')
 @bp.route('/index', methods=['GET', 'POST'])
@@ -14,7 +53,10 @@ from app.models import User
 def index():
     form = CourseSearchForm()
     if form.validate_on_submit():
-        courses = delta_api.search_course(form.query.data)
+        # searched in normalized form so warm-up preloads exactly what users ask for
+        courses = delta_api.search_course(Search.normalize(form.query.data))
+        Search.record(form.query.data)
+        db.session.commit()
         return render_template('index.html', courses=courses, form=form)
     return render_template('index.html', form=form)
 
@@ -55,10 +97,139 @@ def register():
 
 @bp.route('/courses/<course_id>')
 def courses(course_id):
-    sections = delta_api.get_sections(course_id)
-    return render_template('sections.html', sections=sections, section_name=sections[0].course_name if sections else 'Unknown Course')
+    guard = StreamGuard()
+    # start both upstream calls side by side and stream the page shell before either returns
+    name_future = delta_api.submit(delta_api.get_course_name, course_id)
+    sections_future = delta_api.submit(delta_api.get_sections, course_id, course_name='')
+
+    def course_name():
+        return guard.call(delta_api.wait, name_future)
+
+    def fetch_sections():
+        sections = guard.call(delta_api.wait, sections_future) or []
+        name = course_name() or 'null'
+        for section in sections:
+            section._set_course_name(name)
+        return sections
+
+    return stream_template('sections.html', course_id=course_id, course_name=course_name,
+                           fetch_sections=fetch_sections, guard=guard)
 
 @bp.route('/courses/<course_id>/sections/<section_id>')
 def sections(course_id, section_id):
     section = delta_api.get_section(course_id, section_id)
-    return render_template('class.html', section=section)
+    # read-only: history is recorded by the live feed and snapshot pollers, not page views
+    projection = seat_history.projection(section.id, section.end_date) if section is not None else None
+    watching = current_user.is_authenticated and current_user.is_watching(section_id)
+    return render_template('class.html', section=section, projection=projection, watching=watching, form=EmptyForm())
+
+@bp.route('/courses/<course_id>/sections/<section_id>/watch', methods=['POST'])
+@login_required
+def watch(course_id, section_id):
+    form = EmptyForm()
+    if form.validate_on_submit():
+        snapshot = db.session.scalar(sa.select(Section).where(Section.section_id == section_id))
+        if snapshot is None:
+            snapshot = Section(section_id=section_id, course_id=course_id)
+            db.session.add(snapshot)
+        if snapshot not in current_user.watching:
+            current_user.watching.append(snapshot)
+        db.session.commit()
+        if snapshot_refresher.interval:
+            # fill in the snapshot off the request path
+            snapshot_refresher.wake()
+        elif snapshot.refreshed is None:
+            # no refresher is running, so nothing else would ever fill it in
+            try:
+                snapshot_refresher.refresh_course(course_id, {section_id: snapshot})
+                db.session.commit()
+            except Exception as e:
+                db.session.rollback()
+                print(f"Error refreshing snapshot for section {section_id}: {e}")
+        flash('Added to your watchlist')
+    return redirect(url_for('main.sections', course_id=course_id, section_id=section_id))
+
+@bp.route('/courses/<course_id>/sections/<section_id>/unwatch', methods=['POST'])
+@login_required
+def unwatch(course_id, section_id):
+    form = EmptyForm()
+    if form.validate_on_submit():
+        snapshot = db.session.scalar(sa.select(Section).where(Section.section_id == section_id))
+        if snapshot is not None and snapshot in current_user.watching:
+            current_user.watching.remove(snapshot)
+            db.session.commit()
+        flash('Removed from your watchlist')
+    next_page = request.args.get('next')
+    if not next_page or urlsplit(next_page).netloc != '':
+        next_page = url_for('main.sections', course_id=course_id, section_id=section_id)
+    return redirect(next_page)
+
+@bp.route('/watchlist')
+@login_required
+def watchlist():
+    # rendered entirely from the snapshots; no upstream calls
+    sections = db.session.scalars(
+        current_user.watching_select().order_by(Section.course_name, Section.section_number)
+    ).all()
+    return render_template('watchlist.html', sections=sections, form=EmptyForm())
+
+def _seat_stream(key):
+    # every new feed polls upstream until its last viewer leaves; don't start one for a bogus id
+    if not seat_feed.subscriber_count(key) and not seat_feed.exists(key):
+        abort(404)
+    try:
+        q = seat_feed.subscribe(current_app._get_current_object(), key)
+    except TooManyFeeds:
+        return 'Too many live seat feeds are open, try again shortly.', 503
+    return Response(
+        seat_feed.stream(key, q),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
+@bp.route('/courses/<course_id>/live')
+@login_required
+def courses_live(course_id):
+    return _seat_stream(('course', course_id))
+
+@bp.route('/courses/<course_id>/sections/<section_id>/live')
+@login_required
+def sections_live(course_id, section_id):
+    return _seat_stream(('section', course_id, section_id))
+
+@bp.route('/instructors/<name>')
+def instructor(name):
+    instructor = instructor_index.get(name)
+    suggestions = instructor_index.lookup(name) if instructor is None else []
+    return render_template('instructor.html', name=name, instructor=instructor, suggestions=suggestions)
+
+@bp.route('/instructors/<name>/schedule')
+def instructor_schedule(name):
+    # sections stream in as each of the instructor's courses comes back
+    guard = StreamGuard()
+    sections = delta_api.get_instructor_schedule(name)
+    return stream_template('instructor_schedule.html', name=name, sections=guard.iterate(sections), guard=guard)
+
+@bp.route('/admin/upstream')
+@admin_required
+def upstream_metrics():
+    limiter = delta_api.limiter
+    return jsonify(limiter.metrics() if hasattr(limiter, 'metrics') else {})
+
+@bp.route('/admin/profiles')
+@admin_required
+def profiles():
+    return render_template('profiles.html', profiles=request_profiler.list())
+
+@bp.route('/admin/profiles/<profile_id>')
+@admin_required
+def profile(profile_id):
+    profile = request_profiler.load(profile_id)
+    if profile is None:
+        abort(404)
+    return render_template('profile.html', profile=profile)
+
+@bp.route('/admin/profiles/<profile_id>.prof')
+@admin_required
+def profile_stats(profile_id):
+    return send_from_directory(request_profiler.directory, profile_id + '.prof', as_attachment=True)
@@ -1,3 +1,4 @@
+from datetime import date, datetime, time, timezone
 from typing import List, Optional
 
 import sqlalchemy as sa
@@ -34,15 +35,143 @@ class User(UserMixin, db.Model):
 
     def check_password(self, password):
         return check_password_hash(self.password_hash, password)
+
+    def is_watching(self, section_id):
+        query = self.watching_select().where(Section.section_id == section_id)
+        return db.session.scalar(query) is not None
+
+    def watching_select(self):
+        return (
+            sa.select(Section)
+            .join(association_table, association_table.c.section_id == Section.id)
+            .where(association_table.c.user_id == self.id)
+        )
     
 class Section(db.Model):
+    """ Last-known snapshot of a watched section, refreshed in the background """
     __tablename__ = 'section'
     id: Mapped[int] = mapped_column(primary_key=True)
+    section_id: Mapped[str] = mapped_column(sa.String(64), unique=True, index=True)
+    course_id: Mapped[str] = mapped_column(sa.String(64), index=True)
+    course_name: Mapped[Optional[str]] = mapped_column(sa.String(32))
+    section_number: Mapped[Optional[int]]
+    instructors: Mapped[Optional[List[str]]] = mapped_column(sa.JSON)
+    component: Mapped[Optional[str]] = mapped_column(sa.String(32))
+    instruction_mode: Mapped[Optional[str]] = mapped_column(sa.String(32))
+    campus: Mapped[Optional[str]] = mapped_column(sa.String(64))
+    building: Mapped[Optional[str]] = mapped_column(sa.String(32))
+    room: Mapped[Optional[str]] = mapped_column(sa.String(16))
+    days: Mapped[Optional[str]] = mapped_column(sa.String(16))
+    start_time: Mapped[Optional[time]]
+    end_time: Mapped[Optional[time]]
+    start_date: Mapped[Optional[date]]
+    end_date: Mapped[Optional[date]]
+    open_seats: Mapped[Optional[int]]
+    total_seats: Mapped[Optional[int]]
+    # None until the first background refresh
+    refreshed: Mapped[Optional[datetime]] = mapped_column(index=True)
+    # set when the section stops appearing in its course's sections
+    gone: Mapped[bool] = mapped_column(default=False)
+    # when a worker last took this section's course to refresh, so others skip it
+    claimed: Mapped[Optional[datetime]]
+
     watchlist: Mapped[List[User]] = relationship(
         secondary=association_table,
         back_populates='watching'
     )
 
+    def __repr__(self):
+        return '<Section {}>'.format(self.section_number or self.section_id)
+
+    def is_open(self) -> bool:
+        return (self.open_seats or 0) > 0
+
+    def update_from(self, section):
+        """ Copy a delta_api Section into the snapshot """
+        if section.course_name:
+            self.course_name = section.course_name
+        self.section_number = section.section_number
+        self.instructors = section.instructors
+        self.component = section.component
+        self.instruction_mode = section.instruction_mode
+        self.campus = section.campus
+        self.building = section.building
+        self.room = str(section.room) if section.room is not None else None
+        self.days = section.days
+        self.start_time = section.start_time
+        self.end_time = section.end_time
+        self.start_date = section.start_date
+        self.end_date = section.end_date
+        self.open_seats = section.open_seats
+        self.total_seats = section.total_seats
+        self.gone = False
+        self.refreshed = datetime.now(timezone.utc)
+
+    def mark_gone(self):
+        """ The course no longer lists this section; keep the last snapshot but stop refetching it """
+        self.gone = True
+        self.refreshed = datetime.now(timezone.utc)
+
+class SeatHistory(db.Model):
+    """ One chunk of a section's open_seats history, delta + run-length encoded """
+    __tablename__ = 'seat_history'
+    # one chunk per section per start second; also serves every per-section range query
+    __table_args__ = (sa.UniqueConstraint('section_id', 'start'),)
+    id: Mapped[int] = mapped_column(primary_key=True)
+    section_id: Mapped[str] = mapped_column(sa.String(64))
+    # epoch seconds: first sample, last observation, last change
+    start: Mapped[int] = mapped_column(sa.Integer)
+    end: Mapped[int] = mapped_column(sa.Integer)
+    changed: Mapped[int] = mapped_column(sa.Integer)
+    first_seats: Mapped[int] = mapped_column(sa.Integer)
+    last_seats: Mapped[int] = mapped_column(sa.Integer)
+    # varint (seconds since previous change, zigzag seat delta) pairs
+    data: Mapped[bytes] = mapped_column(sa.LargeBinary, default=b'')
+
+    def __repr__(self):
+        return '<SeatHistory {} {}-{}>'.format(self.section_id, self.start, self.end)
+
+class SeatTrend(db.Model):
+    """ Running fill rate per section so projections never touch the raw history """
+    __tablename__ = 'seat_trend'
+    section_id: Mapped[str] = mapped_column(sa.String(64), primary_key=True)
+    seats: Mapped[int] = mapped_column(sa.Integer)
+    updated: Mapped[int] = mapped_column(sa.Integer)
+    # exponentially weighted open_seats change per hour (negative while filling)
+    rate: Mapped[float] = mapped_column(sa.Float, default=0.0)
+
+    def __repr__(self):
+        return '<SeatTrend {} {}>'.format(self.section_id, self.rate)
+
+class Search(db.Model):
+    """ How often each course search is made, used to pick what to warm up """
+    __tablename__ = 'search'
+    text: Mapped[str] = mapped_column(sa.String(64), primary_key=True)
+    count: Mapped[int] = mapped_column(sa.Integer, default=0)
+    last_searched: Mapped[datetime] = mapped_column(index=True, default=lambda: datetime.now(timezone.utc))
+
+    def __repr__(self):
+        return '<Search {} x{}>'.format(self.text, self.count)
+
+    @staticmethod
+    def normalize(text):
+        return ' '.join(text.lower().split())[:64]
+
+    @classmethod
+    def record(cls, text):
+        """ Count one search with an in-database increment, so concurrent searches neither collide nor lose counts """
+        text = cls.normalize(text)
+        now = datetime.now(timezone.utc)
+        increment = sa.update(cls).where(cls.text == text).values(count=cls.count + 1, last_searched=now)
+        if db.session.execute(increment).rowcount:
+            return
+        try:
+            with db.session.begin_nested():
+                db.session.execute(sa.insert(cls).values(text=text, count=1, last_searched=now))
+        except sa.exc.IntegrityError:
+            # another request inserted it first
+            db.session.execute(increment)
+
 @login.user_loader
 def load_user(id):
     return db.session.get(User, int(id))
\ No newline at end of file
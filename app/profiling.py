@@ -0,0 +1,278 @@
+import contextlib
+import cProfile
+import hmac
+import io
+import json
+import os
+import pstats
+import random
+import threading
+import time
+import uuid
+from datetime import datetime, timezone
+from typing import ContextManager, List, Optional
+
+from flask import before_render_template, request, template_rendered
+from sqlalchemy import event
+
+from app import db, delta_api
+
+_local = threading.local()
+
+# span name prefix -> stage shown in the breakdown
+STAGES = (
+    ('upstream', 'upstream'),
+    ('json', 'json'),
+    ('cache', 'cache'),
+    ('delta_api.', 'parse'),
+    ('sql', 'sql'),
+    ('template', 'template'),
+    ('wait', 'wait'),
+)
+
+
+def current_profile() -> Optional['Profile']:
+    return getattr(_local, 'profile', None)
+
+class Profile:
+    """ Span timings for a single request """
+    def __init__(self, method: str, path: str, full=False):
+        self.id = '{}-{}'.format(datetime.now(timezone.utc).strftime('%Y%m%d%H%M%S'), uuid.uuid4().hex[:8])
+        self.method = method
+        self.path = path
+        self.started = time.perf_counter()
+        self.created = datetime.now(timezone.utc)
+        self.duration = None
+        self.status = None
+        self.spans = []
+        # one open-span stack per thread; pool threads add spans alongside the request thread
+        self._stacks = {}
+        self._lock = threading.Lock()
+        self._request_thread = threading.get_ident()
+        self.profiler = cProfile.Profile() if full else None
+
+    def __repr__(self):
+        return '<Profile {} {}>'.format(self.method, self.path)
+
+    @property
+    def stack(self) -> list:
+        """ Open spans of the calling thread """
+        return self._stacks.setdefault(threading.get_ident(), [])
+
+    def push(self, name: str, detail: Optional[str]=None):
+        stack = self.stack
+        stack.append({
+            'name': name,
+            'detail': detail,
+            'start': time.perf_counter() - self.started,
+            'depth': len(stack),
+            'children': 0.0,
+            'worker': threading.get_ident() != self._request_thread,
+        })
+
+    def pop(self):
+        stack = self.stack
+        span = stack.pop()
+        span['duration'] = time.perf_counter() - self.started - span['start']
+        span['self'] = span['duration'] - span.pop('children')
+        if stack:
+            stack[-1]['children'] += span['duration']
+        with self._lock:
+            self.spans.append(span)
+
+    @contextlib.contextmanager
+    def span(self, name: str, detail: Optional[str]=None):
+        self.push(name, detail)
+        try:
+            yield
+        finally:
+            self.pop()
+
+    def breakdown(self) -> dict:
+        """
+        Seconds per stage. Pool-thread spans run alongside the request thread, so
+        stages can add up to more than the duration; 'other' is whatever the
+        request thread's own spans don't account for.
+        """
+        stages = {stage: 0.0 for _, stage in STAGES}
+        accounted = 0.0
+        with self._lock:
+            spans = list(self.spans)
+        for span in spans:
+            for prefix, stage in STAGES:
+                if span['name'].startswith(prefix):
+                    stages[stage] += span['self']
+                    if not span['worker']:
+                        accounted += span['self']
+                    break
+        stages['other'] = max(0.0, (self.duration or 0.0) - accounted)
+        return stages
+
+    def to_dict(self) -> dict:
+        data = {
+            'id': self.id,
+            'method': self.method,
+            'path': self.path,
+            'status': self.status,
+            'created': self.created.isoformat(),
+            'duration': self.duration,
+            'breakdown': self.breakdown(),
+            'spans': sorted(list(self.spans), key=lambda span: span['start']),
+        }
+        if self.profiler is not None:
+            out = io.StringIO()
+            pstats.Stats(self.profiler, stream=out).sort_stats('cumulative').print_stats(40)
+            data['stats'] = out.getvalue()
+        return data
+
+class RequestProfiler:
+    """
+    Opt-in per-request profiling. A request is profiled when it carries
+    X-Profile: <PROFILE_TOKEN> (add X-Profile-Full: 1 for a cProfile dump) or
+    is picked by PROFILE_SAMPLE_RATE. With neither configured no hooks are
+    installed at all.
+    """
+    def __init__(self):
+        self.directory = None
+        self.token = None
+        self.sample_rate = 0.0
+        self.keep = 500
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.token or self.sample_rate)
+
+    def init_app(self, app):
+        self.directory = app.config.get('PROFILE_DIR', os.path.join(app.instance_path, 'profiles'))
+        self.token = app.config.get('PROFILE_TOKEN')
+        self.sample_rate = app.config.get('PROFILE_SAMPLE_RATE', 0.0)
+        self.keep = app.config.get('PROFILE_KEEP', self.keep)
+        if not self.enabled:
+            return
+
+        os.makedirs(self.directory, exist_ok=True)
+        app.before_request(self._start)
+        app.after_request(self._finish)
+        before_render_template.connect(self._template_started, app)
+        template_rendered.connect(self._template_finished, app)
+        delta_api.tracer = self.span
+        delta_api.propagate = self.propagate
+        with app.app_context():
+            event.listen(db.engine, 'before_cursor_execute', self._sql_started)
+            event.listen(db.engine, 'after_cursor_execute', self._sql_finished)
+
+    def span(self, name: str, detail: Optional[str]=None):
+        profile = current_profile()
+        if profile is None:
+            return contextlib.nullcontext()
+        return profile.span(name, detail)
+
+    def propagate(self) -> ContextManager:
+        """ Called in the submitting thread; the pool thread enters the result so its spans join this request's profile """
+        profile = current_profile()
+        if profile is None:
+            return contextlib.nullcontext()
+        return self._adopt(profile)
+
+    @contextlib.contextmanager
+    def _adopt(self, profile: Profile):
+        previous = current_profile()
+        _local.profile = profile
+        try:
+            yield
+        finally:
+            _local.profile = previous
+
+    def _wanted(self) -> Optional[bool]:
+        """ None to skip, otherwise whether to take a full cProfile """
+        header = request.headers.get('X-Profile')
+        if header and self.token and hmac.compare_digest(header.encode(), self.token.encode()):
+            return bool(request.headers.get('X-Profile-Full'))
+        if self.sample_rate and random.random() < self.sample_rate:
+            return False
+        return None
+
+    def _start(self):
+        full = self._wanted()
+        if full is None:
+            _local.profile = None
+            return
+        profile = Profile(request.method, request.full_path.rstrip('?'), full=full)
+        _local.profile = profile
+        if profile.profiler is not None:
+            profile.profiler.enable()
+
+    def _finish(self, response):
+        profile = current_profile()
+        if profile is None:
+            return response
+        profile.status = response.status_code
+
+        def save():
+            # streamed bodies are still rendering in after_request; wait for close
+            if profile.profiler is not None:
+                profile.profiler.disable()
+            profile.duration = time.perf_counter() - profile.started
+            _local.profile = None
+            self.save(profile)
+
+        response.call_on_close(save)
+        return response
+
+    def _template_started(self, sender, template, context, **extra):
+        profile = current_profile()
+        if profile is not None:
+            profile.push('template', template.name)
+
+    def _template_finished(self, sender, template, context, **extra):
+        profile = current_profile()
+        if profile is not None and profile.stack and profile.stack[-1]['name'] == 'template':
+            profile.pop()
+
+    def _sql_started(self, conn, cursor, statement, parameters, context, executemany):
+        profile = current_profile()
+        if profile is not None:
+            profile.push('sql', statement[:200])
+
+    def _sql_finished(self, conn, cursor, statement, parameters, context, executemany):
+        profile = current_profile()
+        if profile is not None and profile.stack and profile.stack[-1]['name'] == 'sql':
+            profile.pop()
+
+    def save(self, profile: Profile):
+        with open(os.path.join(self.directory, profile.id + '.json'), 'w') as f:
+            json.dump(profile.to_dict(), f)
+        if profile.profiler is not None:
+            profile.profiler.dump_stats(os.path.join(self.directory, profile.id + '.prof'))
+        self._prune()
+
+    def _prune(self):
+        names = sorted(name for name in os.listdir(self.directory) if name.endswith('.json'))
+        for name in names[:-self.keep]:
+            for suffix in ('.json', '.prof'):
+                with contextlib.suppress(FileNotFoundError):
+                    os.remove(os.path.join(self.directory, name[:-5] + suffix))
+
+    def list(self) -> List[dict]:
+        if not self.directory or not os.path.isdir(self.directory):
+            return []
+        profiles = []
+        for name in sorted(os.listdir(self.directory), reverse=True):
+            if name.endswith('.json'):
+                profile = self.load(name[:-5])
+                if profile is not None:
+                    profile.pop('spans', None)
+                    profile.pop('stats', None)
+                    profiles.append(profile)
+        return profiles
+
+    def load(self, profile_id: str) -> Optional[dict]:
+        if not self.directory or os.path.basename(profile_id) != profile_id:
+            return None
+        try:
+            with open(os.path.join(self.directory, profile_id + '.json')) as f:
+                return json.load(f)
+        except (FileNotFoundError, ValueError):
+            return None
+
+request_profiler = RequestProfiler()
@@ -0,0 +1,194 @@
+import math
+import time
+from dataclasses import dataclass
+from datetime import date, datetime
+from typing import Iterator, List, Optional, Tuple
+
+import sqlalchemy as sa
+
+from app import db
+from app.models import SeatHistory, SeatTrend
+
+# start a new chunk once the encoded changes reach this many bytes
+CHUNK_BYTES = 512
+# how quickly old seat changes stop influencing the fill rate
+TREND_HALF_LIFE = 6 * 60 * 60
+# slower than this (seats/hour) the trend has decayed to noise; don't project
+MIN_TREND_RATE = 0.05
+# only project fills/reopens this far ahead
+MAX_PROJECTION = 30 * 24 * 60 * 60
+
+
+def _write_varint(out: bytearray, value: int):
+    while value > 0x7f:
+        out.append((value & 0x7f) | 0x80)
+        value >>= 7
+    out.append(value)
+
+def _read_varints(data: bytes) -> Iterator[int]:
+    value = shift = 0
+    for byte in data:
+        value |= (byte & 0x7f) << shift
+        if byte & 0x80:
+            shift += 7
+        else:
+            yield value
+            value = shift = 0
+
+def _zigzag(value: int) -> int:
+    return value * 2 if value >= 0 else -value * 2 - 1
+
+def _unzigzag(value: int) -> int:
+    return value // 2 if value % 2 == 0 else -(value + 1) // 2
+
+def decode(chunk: SeatHistory) -> List[Tuple[int, int]]:
+    """ (epoch seconds, open_seats) at the start of the chunk and at every change """
+    points = [(chunk.start, chunk.first_seats)]
+    t, seats = chunk.start, chunk.first_seats
+    values = _read_varints(chunk.data)
+    for dt, delta in zip(values, values):
+        t += dt
+        seats += _unzigzag(delta)
+        points.append((t, seats))
+    return points
+
+def record(section_id: str, seats: int, at: Optional[int]=None):
+    """
+    Append one poll of a section's open seats. Polls that see the same value as
+    the last one only move the chunk's end time, so long unchanged stretches are free.
+    Does not commit.
+    """
+    at = int(at if at is not None else time.time())
+    chunk = db.session.scalar(
+        sa.select(SeatHistory)
+        .where(SeatHistory.section_id == section_id)
+        .order_by(SeatHistory.start.desc())
+        .limit(1)
+    )
+    if chunk is not None and at < chunk.end:
+        # out-of-order poll; history is append-only
+        return
+
+    if chunk is None or (seats != chunk.last_seats and len(chunk.data) >= CHUNK_BYTES):
+        try:
+            with db.session.begin_nested():
+                db.session.add(SeatHistory(
+                    section_id=section_id, start=at, end=at, changed=at,
+                    first_seats=seats, last_seats=seats, data=b''
+                ))
+        except sa.exc.IntegrityError:
+            # another worker started this section's chunk in the same second and recorded it
+            return
+    elif seats == chunk.last_seats:
+        chunk.end = at
+    else:
+        data = bytearray(chunk.data)
+        _write_varint(data, at - chunk.changed)
+        _write_varint(data, _zigzag(seats - chunk.last_seats))
+        chunk.data = bytes(data)
+        chunk.end = chunk.changed = at
+        chunk.last_seats = seats
+
+    _update_trend(section_id, seats, at)
+
+def _update_trend(section_id: str, seats: int, at: int):
+    trend = db.session.get(SeatTrend, section_id)
+    if trend is None:
+        try:
+            with db.session.begin_nested():
+                db.session.add(SeatTrend(section_id=section_id, seats=seats, updated=at, rate=0.0))
+        except sa.exc.IntegrityError:
+            pass
+        return
+    elapsed = at - trend.updated
+    if elapsed <= 0:
+        trend.seats = seats
+        return
+    observed = (seats - trend.seats) / (elapsed / 3600)
+    weight = 1 - math.exp(-elapsed * math.log(2) / TREND_HALF_LIFE)
+    trend.rate += weight * (observed - trend.rate)
+    trend.seats = seats
+    trend.updated = at
+
+def history(section_id: str, start: int, end: int) -> List[Tuple[int, int]]:
+    """ Change points in [start, end], beginning with the value in effect at start """
+    chunks = db.session.scalars(
+        sa.select(SeatHistory)
+        .where(SeatHistory.section_id == section_id, SeatHistory.start <= end, SeatHistory.end >= start)
+        .order_by(SeatHistory.start)
+    ).all()
+    # the value at `start` may come from a chunk that ended before it
+    if not chunks or chunks[0].start > start:
+        previous = db.session.scalar(
+            sa.select(SeatHistory)
+            .where(SeatHistory.section_id == section_id, SeatHistory.start <= start)
+            .order_by(SeatHistory.start.desc())
+            .limit(1)
+        )
+        if previous is not None and (not chunks or previous.id != chunks[0].id):
+            chunks.insert(0, previous)
+
+    points = []
+    for chunk in chunks:
+        for t, seats in decode(chunk):
+            if t <= start:
+                points = [(start, seats)]
+            elif t <= end:
+                points.append((t, seats))
+    return points
+
+def downsample(section_id: str, start: int, end: int, step: int) -> List[Tuple[int, int, int, int]]:
+    """ (bucket start, min, max, last) open seats per `step` seconds, skipping time before any data """
+    points = history(section_id, start, end)
+    buckets = []
+    i = 0
+    seats = None
+    for bucket in range(start, end, step):
+        bucket_end = bucket + step
+        low = high = seats
+        while i < len(points) and points[i][0] < bucket_end:
+            seats = points[i][1]
+            low = seats if low is None else min(low, seats)
+            high = seats if high is None else max(high, seats)
+            i += 1
+        if seats is not None:
+            buckets.append((bucket, low, high, seats))
+    return buckets
+
+@dataclass
+class SeatProjection:
+    seats: int
+    rate: float
+    updated: datetime
+    fills_at: Optional[datetime] = None
+    reopens_at: Optional[datetime] = None
+
+    def __repr__(self):
+        return '<SeatProjection {} seats {:+.2f}/h>'.format(self.seats, self.rate)
+
+def projection(section_id: str, end_date: Optional[date]=None) -> Optional[SeatProjection]:
+    """
+    When the section is expected to fill (or reopen) at its recent rate. None
+    when the rate has decayed to noise or the date would land more than
+    MAX_PROJECTION away or after the section's end_date.
+    """
+    trend = db.session.get(SeatTrend, section_id)
+    if trend is None or abs(trend.rate) < MIN_TREND_RATE:
+        return None
+    if trend.seats > 0 and trend.rate < 0:
+        seconds = trend.seats / -trend.rate * 3600
+    elif trend.seats <= 0 and trend.rate > 0:
+        seconds = (1 - trend.seats) / trend.rate * 3600
+    else:
+        return None
+    if seconds > MAX_PROJECTION:
+        return None
+    at = datetime.fromtimestamp(trend.updated + seconds)
+    if end_date is not None and at.date() > end_date:
+        return None
+    result = SeatProjection(seats=trend.seats, rate=trend.rate, updated=datetime.fromtimestamp(trend.updated))
+    if trend.rate < 0:
+        result.fills_at = at
+    else:
+        result.reopens_at = at
+    return result
@@ -0,0 +1,94 @@
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone
+
+import sqlalchemy as sa
+
+from app import db, delta_api, seat_history
+from app.background import BackgroundTask
+from app.models import Section, association_table
+from delta_api import BACKGROUND, lane
+
+
+class SnapshotRefresher(BackgroundTask):
+    """
+    Keeps the Section snapshots of watched sections fresh so the watchlist
+    page renders from the database alone. Sections are refreshed a course at
+    a time, one get_sections call covering every watched section in it.
+
+    Every worker runs its own refresher, so each course is claimed in the
+    database before it is fetched and the other workers skip it. Sections that
+    are gone are rechecked only every gone_max_age in case they come back.
+    """
+    def __init__(self, interval=60.0, max_age=120.0, gone_max_age=24 * 60 * 60, claim_timeout=60.0):
+        super().__init__(interval)
+        self.max_age = max_age
+        self.gone_max_age = gone_max_age
+        self.claim_timeout = claim_timeout
+
+    def _stale(self, now):
+        cutoff = now - timedelta(seconds=self.max_age)
+        gone_cutoff = now - timedelta(seconds=self.gone_max_age)
+        return sa.or_(
+            Section.refreshed.is_(None),
+            sa.and_(Section.gone.is_(False), Section.refreshed < cutoff),
+            sa.and_(Section.gone.is_(True), Section.refreshed < gone_cutoff)
+        )
+
+    def stale_courses(self):
+        query = (
+            sa.select(Section)
+            .where(
+                Section.id.in_(sa.select(association_table.c.section_id)),
+                self._stale(datetime.now(timezone.utc))
+            )
+        )
+        courses = defaultdict(dict)
+        for snapshot in db.session.scalars(query):
+            courses[snapshot.course_id][snapshot.section_id] = snapshot
+        return courses
+
+    def claim(self, snapshots) -> bool:
+        """ Take the course unless another worker has refreshed or claimed it since we looked """
+        now = datetime.now(timezone.utc)
+        claim_cutoff = now - timedelta(seconds=self.claim_timeout)
+        claimed = db.session.execute(
+            sa.update(Section)
+            .where(
+                Section.section_id.in_(list(snapshots)),
+                self._stale(now),
+                sa.or_(Section.claimed.is_(None), Section.claimed < claim_cutoff)
+            )
+            .values(claimed=now)
+            .execution_options(synchronize_session=False)
+        ).rowcount
+        db.session.commit()
+        return claimed > 0
+
+    def refresh_course(self, course_id, snapshots):
+        course_name = next((s.course_name for s in snapshots.values() if s.course_name), None)
+        # strict, so a bad response raises rather than marking every section gone
+        sections = delta_api.get_sections(course_id, course_name=course_name, strict=True)
+        for section in sections:
+            snapshot = snapshots.get(section.id)
+            if snapshot is None:
+                continue
+            snapshot.update_from(section)
+            seat_history.record(section.id, section.open_seats)
+        listed = {section.id for section in sections}
+        for section_id, snapshot in snapshots.items():
+            if section_id not in listed:
+                snapshot.mark_gone()
+
+    def run_once(self, app):
+        with app.app_context(), lane(BACKGROUND):
+            for course_id, snapshots in self.stale_courses().items():
+                try:
+                    if not self.claim(snapshots):
+                        continue
+                    self.refresh_course(course_id, snapshots)
+                    db.session.commit()
+                except Exception as e:
+                    db.session.rollback()
+                    print(f"Error refreshing snapshots for course {course_id}: {e}")
+
+snapshot_refresher = SnapshotRefresher()
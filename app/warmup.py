@@ -0,0 +1,75 @@
+import click
+import sqlalchemy as sa
+
+from app import db, delta_api
+from app.background import BackgroundTask
+from app.models import Search, Section, association_table
+from delta_api import BACKGROUND, lane
+from delta_api.cache import operation_name
+from delta_api.queries import COURSE_DETAILS_QUERY, GET_COURSE_NAME_QUERY, SEARCH_COURSE_QUERY
+
+
+class Warmup(BackgroundTask):
+    """
+    Preloads the current term, the most-made searches and the sections of the
+    most-watched courses, then keeps re-requesting them on a schedule.
+
+    Responses land in the shared response cache (DELTA_CACHE_PATH). Each run
+    refetches the entries that would expire before the next one, so with
+    several workers the first to get there refreshes an entry and the rest
+    reuse it. Responses cached for less than the interval still go cold between
+    runs. Without a cache nothing else would keep the responses, so only the
+    term is refreshed.
+    """
+    def __init__(self, interval=300.0, top_searches=20, top_courses=20):
+        super().__init__(interval)
+        self.top_searches = top_searches
+        self.top_courses = top_courses
+
+    def hot_searches(self):
+        return db.session.scalars(
+            sa.select(Search.text).order_by(Search.count.desc()).limit(self.top_searches)
+        ).all()
+
+    def hot_courses(self):
+        watchers = sa.func.count(association_table.c.user_id)
+        return db.session.execute(
+            sa.select(Section.course_id, sa.func.max(Section.course_name))
+            .join(association_table, association_table.c.section_id == Section.id)
+            .group_by(Section.course_id)
+            .order_by(watchers.desc())
+            .limit(self.top_courses)
+        ).all()
+
+    def check_interval(self):
+        """ Warn about warmed responses the cache drops before the next run """
+        if not self.interval or delta_api.cache is None:
+            return
+        for query in (SEARCH_COURSE_QUERY, GET_COURSE_NAME_QUERY, COURSE_DETAILS_QUERY):
+            ttl = delta_api.cache.ttl_for(query)
+            if ttl < self.interval:
+                print(f"Warning: {operation_name(query)} is cached for {ttl}s but warm-up runs every {self.interval}s, "
+                      "so those pages go cold between runs; lower WARMUP_REFRESH_INTERVAL or raise DELTA_CACHE_TTLS")
+
+    def run_once(self, app):
+        with app.app_context(), lane(BACKGROUND):
+            term = delta_api.refresh_terms()
+            if term is None or delta_api.cache is None:
+                return
+            with delta_api.fresh(within=self.interval):
+                self.warm(term)
+
+    def warm(self, term):
+        for query in self.hot_searches():
+            delta_api.search_course(query, term=term)
+        for course_id, course_name in self.hot_courses():
+            # the course page asks for both
+            delta_api.get_course_name(course_id)
+            delta_api.get_sections(course_id, course_name=course_name)
+
+def serving() -> bool:
+    """ False while a flask CLI command other than `flask run` (e.g. `flask db upgrade`) is loading the app """
+    ctx = click.get_current_context(silent=True)
+    return ctx is None or ctx.info_name == 'run'
+
+warmup = Warmup()
@@ -0,0 +1,80 @@
+"""
+Interactive upstream latency while a background crawl saturates the budget.
+
+    python benchmarks/bench_scheduler.py --rate 20 --crawlers 16 --duration 10
+
+Runs against the load-test GraphQL stub and compares a plain TokenBucket
+(first come, first served) with the priority-lane Scheduler at the same rate.
+"""
+import argparse
+import os
+import random
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from delta_api import BACKGROUND, DeltaAPI, Scheduler, TokenBucket, lane  # noqa: E402
+from loadtest.harness import percentile  # noqa: E402
+from loadtest.stub import StubGraphQLServer  # noqa: E402
+
+
+def run(stub, limiter, crawlers, interactive_users, duration):
+    api = DeltaAPI(limiter=limiter)
+    api.url = stub.url
+    deadline = time.monotonic() + duration
+    latencies = []
+    lock = threading.Lock()
+
+    def crawler(i):
+        rng = random.Random(i)
+        with lane(BACKGROUND):
+            while time.monotonic() < deadline:
+                api.get_sections(rng.choice(stub.courses)['id'], course_name='')
+
+    def user(i):
+        rng = random.Random(1000 + i)
+        while time.monotonic() < deadline:
+            started = time.perf_counter()
+            api.get_sections(rng.choice(stub.courses)['id'], course_name='')
+            with lock:
+                latencies.append(time.perf_counter() - started)
+            time.sleep(rng.expovariate(2))
+
+    threads = [threading.Thread(target=crawler, args=(i,)) for i in range(crawlers)]
+    threads += [threading.Thread(target=user, args=(i,)) for i in range(interactive_users)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return latencies
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rate', type=float, default=20.0)
+    parser.add_argument('--crawlers', type=int, default=16)
+    parser.add_argument('--users', type=int, default=4)
+    parser.add_argument('--duration', type=float, default=10.0)
+    parser.add_argument('--latency', type=float, default=0.05)
+    args = parser.parse_args()
+
+    print('{:<28} {:>9} {:>9} {:>9}'.format('scenario', 'requests', 'p50 ms', 'p95 ms'))
+    with StubGraphQLServer(latency=args.latency, courses=50, sections_per_course=20) as stub:
+        scenarios = [
+            ('idle, scheduler', Scheduler(args.rate, args.rate), 0),
+            ('crawl, token bucket', TokenBucket(args.rate, args.rate), args.crawlers),
+            ('crawl, scheduler', Scheduler(args.rate, args.rate), args.crawlers),
+        ]
+        for name, limiter, crawlers in scenarios:
+            latencies = run(stub, limiter, crawlers, args.users, args.duration)
+            print('{:<28} {:>9} {:>9.1f} {:>9.1f}'.format(
+                name, len(latencies), percentile(latencies, 50) * 1000, percentile(latencies, 95) * 1000
+            ))
+            if isinstance(limiter, Scheduler):
+                print('  ', limiter.metrics())
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,136 @@
+"""
+Memory and lookup cost of a term's sections held as plain Section lists
+versus a SectionStore.
+
+    python benchmarks/bench_section_store.py --sections 50000
+
+Sections are parsed from JSON through Section._from_graphql, as the client
+does, so repeated strings arrive as separate objects just like real responses.
+"""
+import argparse
+import gc
+import json
+import os
+import random
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from delta_api.models import Section  # noqa: E402
+from delta_api.store import SectionStore, deep_getsizeof  # noqa: E402
+
+CAMPUSES = ['Stockton', 'Manteca', 'Online', 'Mountain House']
+BUILDINGS = ['SH', 'HOLT', 'CUNN', 'DLTA', 'LOCKE', 'GOLE']
+COMPONENTS = ['Lecture', 'Laboratory', 'Lecture/Lab', 'Activity']
+MODES = ['In Person', 'Online', 'Hybrid']
+DAYS = ['MW', 'TTh', 'MTWTh', 'F', 'S', '']
+SUBJECTS = ['MATH', 'ENG', 'BIOL', 'CHEM', 'HIST', 'PSYC', 'CIS', 'ART', 'MUS', 'PHYS']
+TERM_DATES = [('2026-01-12', '2026-05-22'), ('2026-01-12', '2026-03-13'), ('2026-03-16', '2026-05-22')]
+
+
+def make_payload(count, per_course=12, seed=1):
+    """ GraphQL-shaped section nodes plus the course id/name each belongs to """
+    rng = random.Random(seed)
+    instructors = ['{}, {}'.format(rng.choice(['Smith', 'Garcia', 'Nguyen', 'Lee', 'Patel', 'Brown']), i)
+                   for i in range(count // 20 or 1)]
+    nodes = []
+    for i in range(count):
+        course = i // per_course
+        start_date, end_date = rng.choice(TERM_DATES)
+        start = rng.choice([800, 930, 1100, 1230, 1400, 1800])
+        nodes.append({
+            'course_id': 'C{:06d}'.format(course),
+            'course_name': '{} {}'.format(SUBJECTS[course % len(SUBJECTS)], course // len(SUBJECTS)),
+            'node': {
+                'id': 'S{:07d}'.format(i),
+                'registrationNumber': str(20000 + i),
+                'instructors': [rng.choice(instructors)],
+                'instructionMode': rng.choice(MODES),
+                'careers': ['Credit'],
+                'openSeats': rng.randint(0, 40),
+                'totalSeats': 40,
+                'campus': rng.choice(CAMPUSES),
+                'component': rng.choice(COMPONENTS),
+                'freeTextbookAvailable': rng.random() < 0.2,
+                'lowCostTextbookAvailable': rng.random() < 0.4,
+                'meetings': [{
+                    'room': str(rng.randint(100, 260)),
+                    'buildingCode': rng.choice(BUILDINGS),
+                    'days': rng.choice(DAYS),
+                    'startDate': start_date,
+                    'endDate': end_date,
+                    'startTime': start,
+                    'endTime': start + 115,
+                }],
+            },
+        })
+    return json.dumps(nodes)
+
+
+def load_sections(payload):
+    sections = []
+    for item in json.loads(payload):
+        section = Section._from_graphql(item['node'])
+        section._set_course_id(item['course_id'])
+        section._set_course_name(item['course_name'])
+        sections.append(section)
+    return sections
+
+
+def traced(build):
+    """ (result, bytes still allocated once build returns, seconds) """
+    gc.collect()
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = build()
+    elapsed = time.perf_counter() - start
+    gc.collect()
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return result, size, elapsed
+
+
+def timed(label, count, fn):
+    start = time.perf_counter()
+    for _ in range(count):
+        fn()
+    print('{:<28} {:>10.2f} us'.format(label, (time.perf_counter() - start) / count * 1e6))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sections', type=int, default=50000)
+    parser.add_argument('--lookups', type=int, default=20000)
+    args = parser.parse_args()
+
+    payload = make_payload(args.sections)
+    sections, list_traced, list_seconds = traced(lambda: load_sections(payload))
+    list_deep = deep_getsizeof(sections)
+    del sections
+
+    store, store_traced, store_seconds = traced(lambda: SectionStore(load_sections(payload)))
+    footprint = store.memory_footprint()
+
+    mb = 1024 * 1024
+    print('{} sections, {} distinct pooled values'.format(footprint['sections'], footprint['distinct_values']))
+    print('{:<14} {:>12} {:>12} {:>10}'.format('', 'traced MB', 'deep MB', 'build s'))
+    print('{:<14} {:>12.1f} {:>12.1f} {:>10.2f}'.format('list[Section]', list_traced / mb, list_deep / mb, list_seconds))
+    print('{:<14} {:>12.1f} {:>12.1f} {:>10.2f}'.format('SectionStore', store_traced / mb, footprint['total'] / mb, store_seconds))
+    print('store breakdown: records {:.1f} MB, indexes {:.1f} MB, pool {:.1f} MB'.format(
+        footprint['records'] / mb, footprint['indexes'] / mb, footprint['pool'] / mb))
+    print('saved {:.0%} of traced memory'.format(1 - store_traced / list_traced))
+
+    rng = random.Random(2)
+    ids = [record.id for record in store]
+    numbers = [record.section_number for record in store]
+    courses = list({record.course_id for record in store})
+    timed('get(section_id)', args.lookups, lambda: store.get(rng.choice(ids)))
+    timed('by_number(registration)', args.lookups, lambda: store.by_number(rng.choice(numbers)))
+    timed('by_course(course_id)', args.lookups, lambda: store.by_course(rng.choice(courses)))
+    timed('to_section()', args.lookups, lambda: store.get(rng.choice(ids)).to_section())
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,125 @@
+"""
+Time-to-first-byte and full-render timings for main.courses on large courses.
+
+    python benchmarks/bench_sections.py --sections 100 300 800 --latency 0.25
+
+Upstream calls are replaced by in-memory sections with an artificial delay so
+the numbers measure the app, not the network.
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+from datetime import date, time as dtime
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from config import Config  # noqa: E402
+
+from app import create_app, delta_api  # noqa: E402
+from app.fragments import section_fragments  # noqa: E402
+from delta_api.models import Section  # noqa: E402
+
+
+class BenchConfig(Config):
+    TESTING = True
+    SQLALCHEMY_DATABASE_URI = 'sqlite://'
+    JINJA_BYTECODE_CACHE_DIR = os.path.join(tempfile.gettempdir(), 'delta_tools_bench_jinja')
+    SNAPSHOT_REFRESH_INTERVAL = 0
+    # measure the template alone, never the real deployment's cache, index or limits
+    DELTA_CACHE_PATH = None
+    UPSTREAM_RATE = None
+    WARMUP_ON_START = False
+    WARMUP_REFRESH_INTERVAL = 0
+    INSTRUCTOR_INDEX_PATH = None
+    PROFILE_TOKEN = None
+    PROFILE_SAMPLE_RATE = 0.0
+
+
+def make_sections(course_id, count):
+    return [
+        Section(
+            id='{}-{}'.format(course_id, i),
+            section_number=30000 + i,
+            instructors=['Instructor {}'.format(i % 40)],
+            instruction_mode='In Person',
+            careers=['Credit'],
+            open_seats=i % 7,
+            total_seats=30,
+            campus='Stockton',
+            component='Lecture',
+            free_textbook=False,
+            low_cost_textbook=True,
+            room=100 + i % 50,
+            building='SH',
+            days='MW',
+            start_date=date(2026, 1, 12),
+            end_date=date(2026, 5, 22),
+            start_time=dtime(9, 30),
+            end_time=dtime(10, 45),
+            course_name='MATH 1',
+            course_id=course_id,
+        )
+        for i in range(count)
+    ]
+
+
+def patch_upstream(latency, count):
+    def get_course_name(course_id):
+        time.sleep(latency)
+        return 'MATH 1'
+
+    def get_sections(course_id, course_name=None, **kwargs):
+        time.sleep(latency)
+        return make_sections(course_id, count)
+
+    delta_api.get_course_name = get_course_name
+    delta_api.get_sections = get_sections
+
+
+def measure(client, url):
+    """ (first byte, page shell through the <h1>, whole page) seconds and the page size """
+    start = time.perf_counter()
+    response = client.get(url, buffered=False)
+    first_byte = shell = None
+    body = b''
+    for chunk in response.response:
+        if chunk and first_byte is None:
+            first_byte = time.perf_counter() - start
+        body += chunk
+        if shell is None and b'<h1>' in body:
+            shell = time.perf_counter() - start
+    total = time.perf_counter() - start
+    response.close()
+    return first_byte, shell, total, len(body)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sections', type=int, nargs='+', default=[100, 300, 800])
+    parser.add_argument('--latency', type=float, default=0.25, help='simulated upstream seconds per course')
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    app = create_app(BenchConfig)
+    app.jinja_env.get_template('sections.html')
+    print('app + template load: {:.1f} ms'.format((time.perf_counter() - start) * 1000))
+
+    client = app.test_client()
+    print('{:>9} {:>12} {:>12} {:>12} {:>14} {:>10}'.format('sections', 'ttfb ms', 'shell ms', 'cold ms', 'warm ms', 'bytes'))
+    for count in args.sections:
+        patch_upstream(args.latency, count)
+        url = '/courses/BENCH{}'.format(count)
+
+        section_fragments.clear()
+        ttfb, shell, cold, size = measure(client, url)
+        warm = min(measure(client, url)[2] for _ in range(args.repeat))
+        print('{:>9} {:>12.1f} {:>12.1f} {:>12.1f} {:>14.1f} {:>10}'.format(
+            count, ttfb * 1000, shell * 1000, cold * 1000, warm * 1000, size
+        ))
+
+
+if __name__ == '__main__':
+    main()
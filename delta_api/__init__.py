@@ -1 +1,5 @@
-from delta_api.client import DeltaAPI
\ No newline at end of file
+from delta_api.cache import SQLiteCache
+from delta_api.client import DeltaAPI
+from delta_api.instructors import InstructorIndex
+from delta_api.ratelimit import BACKGROUND, INTERACTIVE, Scheduler, SchedulerFull, TokenBucket, lane
+from delta_api.store import SectionRecord, SectionStore
@@ -0,0 +1,156 @@
+import argparse
+import contextlib
+import json
+import os
+import sys
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import asdict
+from typing import Iterable, List, Optional, Set, TextIO
+
+from delta_api.client import DeltaAPI
+from delta_api.models import Course, Term
+from delta_api.ratelimit import TokenBucket
+
+
+def write_record(out: TextIO, kind: str, obj, **extra):
+    record = dict(asdict(obj), type=kind, **extra)
+    out.write(json.dumps(record, default=str) + '\n')
+
+def find_term(api: DeltaAPI, code: Optional[int]) -> Term:
+    try:
+        terms = api.get_terms()
+    except Exception as e:
+        raise SystemExit('Could not fetch the term list: {}'.format(e))
+    if not terms:
+        raise SystemExit('Could not fetch the term list')
+    if code is None:
+        return terms[0]
+    for term in terms:
+        if term.code == code:
+            return term
+    raise SystemExit('Unknown term {}'.format(code))
+
+def load_done(path: Optional[str]) -> Set[str]:
+    if not path or not os.path.exists(path):
+        return set()
+    with open(path) as f:
+        return {line.strip() for line in f if line.strip()}
+
+def dump_sections(api: DeltaAPI, out: TextIO, courses: List[Course], workers: int, state: Optional[str]):
+    """
+    Fetch sections for every course on a bounded pool, writing each course's
+    sections as soon as they arrive. Finished course ids are appended to `state`
+    so an interrupted run picks up where it stopped.
+    """
+    done = load_done(state)
+    pending = [course for course in courses if course.id not in done]
+    if len(pending) < len(courses):
+        print('Skipping {} already dumped courses'.format(len(courses) - len(pending)), file=sys.stderr)
+
+    state_file = open(state, 'a') if state else None
+    failed = 0
+    try:
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            queue = iter(pending)
+            running = {}
+
+            def submit_next():
+                course = next(queue, None)
+                if course is not None:
+                    course_name = '{} {}'.format(course.subject_id, course.course_number) if course.subject_id else None
+                    # strict, so a malformed response counts as a failure instead of an empty course
+                    running[executor.submit(api.get_sections, course.id, course_name=course_name, strict=True)] = course
+
+            # keep at most 2x workers in flight so an interrupt leaves little half-done work
+            for _ in range(workers * 2):
+                submit_next()
+            try:
+                while running:
+                    finished, _ = wait(running, return_when=FIRST_COMPLETED)
+                    for future in finished:
+                        course = running.pop(future)
+                        try:
+                            sections = future.result()
+                        except Exception as e:
+                            failed += 1
+                            print('Error fetching sections for course {}: {}'.format(course.id, e), file=sys.stderr)
+                        else:
+                            for section in sections:
+                                write_record(out, 'section', section)
+                            out.flush()
+                            if state_file:
+                                state_file.write(course.id + '\n')
+                                state_file.flush()
+                        submit_next()
+            except KeyboardInterrupt:
+                for future in running:
+                    future.cancel()
+                raise
+    finally:
+        if state_file:
+            state_file.close()
+    return failed
+
+def course_stubs(ids: Iterable[str]) -> List[Course]:
+    return [Course(id=course_id, subject_id='', course_number='', title='') for course_id in ids]
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m delta_api', description='Dump Delta College schedule data as NDJSON.')
+    parser.add_argument('--workers', type=int, default=8, help='concurrent upstream requests')
+    parser.add_argument('--rate', type=float, default=5.0, help='upstream requests per second')
+    parser.add_argument('--burst', type=float, default=5.0, help='requests allowed back to back')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    subparsers.add_parser('terms', help='list terms, newest first')
+
+    search = subparsers.add_parser('search', help='search courses by prefix')
+    search.add_argument('query')
+    search.add_argument('--term', type=int, help='term code (defaults to the current term)')
+    search.add_argument('--count', type=int, default=100)
+
+    sections = subparsers.add_parser('sections', help='dump sections for courses')
+    source = sections.add_mutually_exclusive_group(required=True)
+    source.add_argument('--course', dest='course_ids', nargs='+', metavar='COURSE_ID')
+    source.add_argument('--subject', help='every course in a subject, e.g. MATH')
+    source.add_argument('--all', action='store_true', help='every course in the term')
+    sections.add_argument('--term', type=int, help='term code (defaults to the current term)')
+    sections.add_argument('--state', help='file recording finished courses, used to resume a run; '
+                          'rerun with the same --state and append to the same output (>>) so earlier records are kept')
+
+    args = parser.parse_args(argv)
+    api = DeltaAPI(limiter=TokenBucket(args.rate, args.burst))
+    out = sys.stdout
+
+    # the client reports errors with print(); keep stdout pure NDJSON
+    with contextlib.redirect_stdout(sys.stderr):
+        try:
+            if args.command == 'terms':
+                for term in api.get_terms():
+                    write_record(out, 'term', term)
+            elif args.command == 'search':
+                for course in api.search_course(args.query, count=args.count, term=find_term(api, args.term)):
+                    write_record(out, 'course', course)
+            elif args.command == 'sections':
+                if args.course_ids:
+                    courses = course_stubs(args.course_ids)
+                else:
+                    term = find_term(api, args.term)
+                    try:
+                        # strict, so a failed page can't pass off part of the term as all of it
+                        courses = api.get_courses(term, strict=True)
+                    except Exception as e:
+                        raise SystemExit('Could not list the courses for {}: {}'.format(term.name, e))
+                    if args.subject:
+                        courses = [course for course in courses if course.subject_id.upper() == args.subject.upper()]
+                failed = dump_sections(api, out, courses, args.workers, args.state)
+                if failed:
+                    print('{} courses failed; rerun with the same --state to retry them'.format(failed), file=sys.stderr)
+                    return 1
+        except KeyboardInterrupt:
+            print('Interrupted', file=sys.stderr)
+            return 130
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
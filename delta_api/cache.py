@@ -0,0 +1,175 @@
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+import uuid
+from typing import Callable, Dict, Optional
+
+# seconds each upstream response stays fresh, by GraphQL operation name
+DEFAULT_TTLS = {
+    'routes_Landing_Query': 60 * 60,
+    'routes_CourseContainer_Query': 24 * 60 * 60,
+    'SearchAutoCompleteQuery_Query': 60 * 60,
+    'routes_InstructorCourses_Query': 60 * 60,
+    'CourseDetailsQuery_Query': 60,
+    'routes_SectionContainer_Query': 30,
+}
+
+_OPERATION_RE = re.compile(r'query\s+(\w+)')
+
+
+def operation_name(query: str) -> str:
+    match = _OPERATION_RE.search(query)
+    return match.group(1) if match else 'anonymous'
+
+def cache_key(query: str, variables: dict) -> str:
+    return '{}:{}'.format(
+        operation_name(query),
+        json.dumps(variables, sort_keys=True, separators=(',', ':'))
+    )
+
+class SQLiteCache:
+    """
+    Response cache shared by every process pointing at the same file.
+
+    SQLite in WAL mode lets any number of readers run alongside one writer, so
+    web workers can share upstream responses and a restarted worker starts warm.
+    A lease row per key makes concurrent misses wait for one fetch instead of
+    each going upstream.
+    """
+    def __init__(self, path: str, ttls: Optional[Dict[str, int]]=None, default_ttl=300,
+                 max_bytes=64 * 1024 * 1024, lease_timeout=10.0):
+        self.path = path
+        self.ttls = dict(DEFAULT_TTLS, **(ttls or {}))
+        self.default_ttl = default_ttl
+        self.max_bytes = max_bytes
+        self.lease_timeout = lease_timeout
+        self._local = threading.local()
+        self._init_schema()
+
+    def __repr__(self):
+        return '<SQLiteCache {}>'.format(self.path)
+
+    @property
+    def _conn(self) -> sqlite3.Connection:
+        # sqlite connections must not cross threads or survive a fork
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def _init_schema(self):
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS responses (
+                key TEXT PRIMARY KEY,
+                value TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                expires REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS responses_expires ON responses (expires);
+            CREATE TABLE IF NOT EXISTS leases (
+                key TEXT PRIMARY KEY,
+                owner TEXT NOT NULL,
+                expires REAL NOT NULL
+            );
+        """)
+
+    def ttl_for(self, query: str) -> int:
+        return self.ttls.get(operation_name(query), self.default_ttl)
+
+    def get(self, key: str, min_ttl=0.0) -> Optional[dict]:
+        """ The cached value, unless it expires within `min_ttl` seconds """
+        row = self._conn.execute(
+            'SELECT value FROM responses WHERE key = ? AND expires > ?',
+            (key, time.time() + min_ttl)
+        ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def set(self, key: str, value: dict, ttl: float):
+        encoded = json.dumps(value, separators=(',', ':'))
+        self._conn.execute(
+            'INSERT OR REPLACE INTO responses (key, value, size, expires) VALUES (?, ?, ?, ?)',
+            (key, encoded, len(encoded), time.time() + ttl)
+        )
+        self.evict()
+
+    def delete(self, key: str):
+        self._conn.execute('DELETE FROM responses WHERE key = ?', (key,))
+
+    def clear(self):
+        self._conn.execute('DELETE FROM responses')
+        self._conn.execute('DELETE FROM leases')
+
+    def size(self) -> int:
+        return self._conn.execute('SELECT COALESCE(SUM(size), 0) FROM responses').fetchone()[0]
+
+    def evict(self):
+        """ Drop expired rows, then the rows closest to expiring, until under max_bytes """
+        conn = self._conn
+        total = self.size()
+        if total <= self.max_bytes:
+            return
+        conn.execute('DELETE FROM responses WHERE expires <= ?', (time.time(),))
+        total = self.size()
+        while total > self.max_bytes:
+            conn.execute(
+                'DELETE FROM responses WHERE key IN (SELECT key FROM responses ORDER BY expires LIMIT 64)'
+            )
+            total = self.size()
+
+    def _acquire_lease(self, key: str, owner: str) -> bool:
+        conn = self._conn
+        now = time.time()
+        conn.execute('DELETE FROM leases WHERE key = ? AND expires <= ?', (key, now))
+        cursor = conn.execute(
+            'INSERT OR IGNORE INTO leases (key, owner, expires) VALUES (?, ?, ?)',
+            (key, owner, now + self.lease_timeout)
+        )
+        return cursor.rowcount == 1
+
+    def _release_lease(self, key: str, owner: str):
+        self._conn.execute('DELETE FROM leases WHERE key = ? AND owner = ?', (key, owner))
+
+    def fetch(self, query: str, variables: dict, fetch: Callable[[], dict], min_ttl=0.0) -> dict:
+        """
+        Return the cached response, or run fetch() once across all processes and
+        cache it. With `min_ttl`, a response expiring within that many seconds
+        counts as missing, unless it was stored less than half its TTL ago.
+        """
+        key = cache_key(query, variables)
+        min_ttl = min(min_ttl, self.ttl_for(query) / 2)
+        value = self.get(key, min_ttl)
+        if value is not None:
+            return value
+
+        owner = uuid.uuid4().hex
+        deadline = time.monotonic() + self.lease_timeout
+        while not self._acquire_lease(key, owner):
+            # someone else is fetching this key; wait for their result
+            time.sleep(0.05)
+            value = self.get(key, min_ttl)
+            if value is not None:
+                return value
+            if time.monotonic() > deadline:
+                return fetch()
+
+        try:
+            value = self.get(key, min_ttl)
+            if value is None:
+                value = fetch()
+                self.set(key, value, self.ttl_for(query))
+            return value
+        finally:
+            self._release_lease(key, owner)
+
+    def refresh(self, query: str, variables: dict, fetch: Callable[[], dict]) -> dict:
+        """ Run fetch() whatever is cached and store the result for every other reader """
+        value = fetch()
+        self.set(cache_key(query, variables), value, self.ttl_for(query))
+        return value
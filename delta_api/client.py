@@ -1,4 +1,10 @@
-from typing import List, Optional
+import contextlib
+import functools
+import os
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed
+from typing import Callable, ContextManager, Iterator, List, Optional, Union
 
 import requests
 
@@ -11,10 +17,37 @@ from delta_api.queries import (
     GET_INSTRUCTOR_QUERY,
 )
 
+from delta_api.cache import SQLiteCache
 from delta_api.models import Course, Section, Term, Instructor
+from delta_api.instructors import normalize_name
+from delta_api.ratelimit import Scheduler, SchedulerFull, TokenBucket, current_lane, lane
+
+_local = threading.local()
+
+def traced(method):
+    """ Report the call as a 'delta_api.<method>' span to the tracer, if any """
+    name = 'delta_api.' + method.__name__
+
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        with self._span(name):
+            return method(self, *args, **kwargs)
+    return wrapper
 
 class DeltaAPI:
-    def __init__(self):
+    def __init__(self, cache: Optional[SQLiteCache]=None, limiter: Optional[Union[TokenBucket, Scheduler]]=None,
+                 max_workers=16):
+        self.cache = cache
+        self.limiter = limiter
+        # size of the process-wide pool behind submit()
+        self.max_workers = max_workers
+        self._executor = None
+        self._executor_pid = None
+        self._executor_lock = threading.Lock()
+        # called with a span name, returns a context manager timing it
+        self.tracer: Optional[Callable[[str], ContextManager]] = None
+        # called in a thread handing work to submit(); the pool thread runs the task inside the result
+        self.propagate: Optional[Callable[[], ContextManager]] = None
         self.environment = 'deltacollege'
         self.url = 'https://api.collegescheduler.com/graphql'
         self.headers = {
@@ -30,21 +63,99 @@ class DeltaAPI:
             self._current_term = terms[0] if terms else None
         return self._current_term
 
+    def refresh_terms(self) -> Optional[Term]:
+        """ Re-read the term list so a term rollover is picked up without a restart """
+        terms = self.get_terms()
+        if terms:
+            self._current_term = terms[0]
+        return self.current_term
+
+    def submit(self, fn, *args, **kwargs) -> Future:
+        """
+        Run `fn` on a pool shared by every caller in this process, so concurrent
+        page views can't multiply upstream threads. The pool is recreated after a
+        fork, and tasks run in the submitting thread's lane and trace context.
+        """
+        if self._executor_pid != os.getpid():
+            with self._executor_lock:
+                if self._executor_pid != os.getpid():
+                    self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='delta_api')
+                    self._executor_pid = os.getpid()
+        caller_lane = current_lane()
+        context = self.propagate() if self.propagate is not None else contextlib.nullcontext()
+
+        def run():
+            with lane(caller_lane), context:
+                return fn(*args, **kwargs)
+
+        return self._executor.submit(run)
+
+    def wait(self, future: Future):
+        """ Block on a submit() future, traced as a 'wait' span so it isn't billed to the caller's own work """
+        with self._span('wait'):
+            return future.result()
+
+    def _span(self, name: str) -> ContextManager:
+        if self.tracer is None:
+            return contextlib.nullcontext()
+        return self.tracer(name)
+
+    @contextlib.contextmanager
+    def fresh(self, within: Optional[float]=None):
+        """
+        Skip cached reads for requests this thread makes inside the block; results
+        still refill the cache. With `within`, only responses expiring in the next
+        `within` seconds are refetched, still once across all processes.
+        """
+        previous = getattr(_local, 'fresh', None)
+        _local.fresh = True if within is None else within
+        try:
+            yield
+        finally:
+            _local.fresh = previous
+
     def _request(self, query: str, variables: dict):
-        r = requests.post(
-            url = self.url,
-            headers = self.headers,
-            json= {
-                'query': query, 
-                'variables': variables
-            }
-        )
-        data = r.json()
+        if self.cache is None:
+            return self._fetch(query, variables)
+        fresh = getattr(_local, 'fresh', None)
+        with self._span('cache'):
+            if fresh is True:
+                return self.cache.refresh(query, variables, lambda: self._fetch(query, variables))
+            return self.cache.fetch(query, variables, lambda: self._fetch(query, variables), min_ttl=fresh or 0.0)
+
+    def _fetch(self, query: str, variables: dict):
+        if self.limiter is None:
+            return self._post(query, variables)
+        self.limiter.acquire()
+        started = time.monotonic()
+        try:
+            data = self._post(query, variables)
+        except Exception:
+            self.limiter.report(time.monotonic() - started, False)
+            raise
+        self.limiter.report(time.monotonic() - started, True)
+        return data
+
+    def _post(self, query: str, variables: dict):
+        with self._span('upstream'):
+            r = requests.post(
+                url = self.url,
+                headers = self.headers,
+                json= {
+                    'query': query, 
+                    'variables': variables
+                }
+            )
+        with self._span('json'):
+            data = r.json()
         if "errors" in data:
             raise Exception(data["errors"][0]["message"])
         return data
     
-    def get_sections(self, course_id, count=100, include_full=True) -> List[Section]:
+    @traced
+    def get_sections(self, course_id, count=100, include_full=True, course_name: Optional[str]=None,
+                     strict=False) -> List[Section]:
+        """ With `strict`, a malformed response raises instead of returning [] """
         data = self._request(
             COURSE_DETAILS_QUERY,                        
             {
@@ -62,7 +173,8 @@ class DeltaAPI:
         )
 
         try:
-            course_name = self.get_course_name(course_id) or 'null'
+            if course_name is None:
+                course_name = self.get_course_name(course_id) or 'null'
 
             sections = []
             for section_data in map(lambda section: section['node'], data['data']['environment']['getCourseSections']['edges']):
@@ -72,9 +184,12 @@ class DeltaAPI:
                 sections.append(section)
             return sections
         except Exception as e:
+            if strict:
+                raise
             print(f"Error fetching sections for course {course_id}: {e}")
             return []
 
+    @traced
     def get_course_name(self, course_id) -> Optional[str]:
         data = self._request(
             GET_COURSE_NAME_QUERY,
@@ -90,6 +205,7 @@ class DeltaAPI:
             print(f"Error fetching course name for {course_id}: {e}")
             return None
 
+    @traced
     def get_terms(self) -> List[Term]:
         data = self._request(
             GET_TERMS_QUERY,
@@ -111,6 +227,7 @@ class DeltaAPI:
             print(f"Error fetching terms: {e}")
             return []
 
+    @traced
     def search_course(self, query: str, count=100, term: Optional[Term]=None) -> List[Course]:
         data = self._request(
             SEARCH_COURSE_QUERY,
@@ -136,7 +253,8 @@ class DeltaAPI:
             print(f"Error searching courses with query '{query}': {e}")
             return []
 
-    def get_section(self, course_id: str, section_id: str) -> Optional[Section]:
+    @traced
+    def get_section(self, course_id: str, section_id: str, course_name: Optional[str]=None) -> Optional[Section]:
         data = self._request(
             GET_SECTION_QUERY,
             {
@@ -149,7 +267,8 @@ class DeltaAPI:
         try:
             section_data = data['data']['section']
             section = Section._from_graphql(section_data)
-            course_name = self.get_course_name(course_id) or 'null'
+            if course_name is None:
+                course_name = self.get_course_name(course_id) or 'null'
             section._set_course_name(course_name)
             section._set_course_id(course_id)
             return section
@@ -157,6 +276,47 @@ class DeltaAPI:
             print(f"Error fetching section {course_id} {section_id}: {e}")
             return None
 
+    @traced
+    def get_courses(self, term: Optional[Term]=None, count=100, strict=False) -> List[Course]:
+        """ With `strict`, a malformed page raises instead of returning the courses read so far """
+        term = term or self.current_term
+        courses = []
+        cursor = None
+        while True:
+            # findCourses without facets pages through every course in the term
+            data = self._request(
+                GET_INSTRUCTOR_QUERY,
+                {
+                    "environment": self.environment,
+                    "termCode": term.code,
+                    "count": count,
+                    "cursor": cursor,
+                    "facets": [],
+                    "includeFullCourses": True
+                }
+            )
+
+            try:
+                find_data = data['data']['environment']['findCourses']
+                for course_data in find_data['edges']:
+                    course = Course(id=course_data['node']['id'],
+                                    subject_id=course_data['node']['subject']['id'],
+                                    course_number=course_data['node']['courseNumber'],
+                                    title=course_data['node']['title'])
+                    course._set_term(term)
+                    courses.append(course)
+                page_info = find_data['pageInfo']
+                if not page_info['hasNextPage']:
+                    break
+                cursor = page_info['endCursor']
+            except Exception as e:
+                if strict:
+                    raise
+                print(f"Error fetching courses for term {term.code}: {e}")
+                break
+        return courses
+
+    @traced
     def get_instructor(self, name: str, term: Optional[Term]=None) -> Optional[Instructor]:
         data = self._request(
             GET_INSTRUCTOR_QUERY,
@@ -179,14 +339,51 @@ class DeltaAPI:
         try:
             instructor_data = data['data']['environment']
             instructor = Instructor._from_graphql(instructor_data)
-            instructor._set_term(self.current_term)
+            instructor._set_term(term or self.current_term)
             instructor._set_name(name)
             return instructor
         except Exception as e:
             print(f"Error fetching instructor {name}: {e}")
             return None
 
-if __name__ == '__main__':
-    delta_api = DeltaAPI()
-    print(delta_api.search_course('math'))
-    print(delta_api.get_terms())
\ No newline at end of file
+    def get_instructor_schedule(self, name: str, term: Optional[Term]=None) -> Iterator[Section]:
+        """
+        Sections taught by `name`, yielded course by course as the concurrent
+        get_sections calls complete rather than after the slowest one.
+        """
+        instructor = self.get_instructor(name, term)
+        if instructor is None or not instructor.courses:
+            return
+
+        key = normalize_name(name)
+        busy = 0
+        futures = {
+            self.submit(self.get_sections, course.id,
+                        course_name='{} {}'.format(course.subject_id, course.course_number)): course
+            for course in instructor.courses
+        }
+        try:
+            completed = as_completed(futures)
+            while True:
+                with self._span('wait'):
+                    future = next(completed, None)
+                if future is None:
+                    break
+                try:
+                    sections = future.result()
+                except SchedulerFull:
+                    busy += 1
+                    continue
+                except Exception as e:
+                    print(f"Error fetching sections for course {futures[future].id}: {e}")
+                    continue
+                for section in sections:
+                    if any(normalize_name(instructor) == key for instructor in section.instructors or []):
+                        yield section
+        finally:
+            # the consumer may stop early; don't leave its fetches queued on the shared pool
+            for future in futures:
+                future.cancel()
+        # after the courses that did come back, so callers can show partial results
+        if busy:
+            raise SchedulerFull('{} of {} courses were turned away by the scheduler'.format(busy, len(instructor.courses)))
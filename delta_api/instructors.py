@@ -0,0 +1,240 @@
+import bisect
+import difflib
+import json
+import os
+import re
+import threading
+from dataclasses import asdict, dataclass, field
+from datetime import date, time
+from typing import Dict, Iterable, List, Optional
+
+from delta_api.models import Course, Section, Term
+
+
+def normalize_name(name: str) -> str:
+    """ 'Smith,  John A.' -> 'smith john a' """
+    return ' '.join(re.sub(r'[^\w\s]', ' ', name).casefold().split())
+
+@dataclass
+class InstructorEntry:
+    """ Everything one instructor teaches in a term """
+    name: str
+    courses: Dict[str, Course] = field(default_factory=dict)
+    sections: Dict[str, Section] = field(default_factory=dict)
+
+    def __repr__(self):
+        return '<InstructorEntry {}>'.format(self.name)
+
+    def sorted_courses(self) -> List[Course]:
+        return sorted(self.courses.values(), key=lambda course: (course.subject_id, course.course_number))
+
+    def sorted_sections(self) -> List[Section]:
+        return sorted(self.sections.values(), key=lambda section: (section.course_name or '', section.section_number))
+
+class InstructorIndex:
+    """
+    Reverse index of normalized instructor name -> courses and sections,
+    built from a single crawl of every course section in a term.
+    """
+    def __init__(self, term: Optional[Term]=None):
+        self.term = term
+        self._lock = threading.Lock()
+        self._entries: Dict[str, InstructorEntry] = {}
+        # course id -> normalized names teaching it, so a course can be re-crawled in place
+        self._course_names: Dict[str, set] = {}
+        # sorted (token, normalized name) pairs for prefix lookup on any part of a name
+        self._tokens: List[tuple] = []
+        # courses whose last crawl failed and were left as they were
+        self.failed: List[Course] = []
+        # file this index was last loaded from or saved to, and its mtime then
+        self.path: Optional[str] = None
+        self._mtime: Optional[float] = None
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __repr__(self):
+        return '<InstructorIndex {} ({} instructors)>'.format(self.term.name if self.term else None, len(self))
+
+    def build(self, api, term: Optional[Term]=None, courses: Optional[Iterable[Course]]=None):
+        term = term or self.term or api.current_term
+        if courses is None:
+            # strict, so a failed page fails the build instead of saving part of the term
+            courses = api.get_courses(term, strict=True)
+        # crawl into a fresh index so lookups keep answering from the old one meanwhile
+        fresh = InstructorIndex(term).refresh(api, courses)
+        with self._lock:
+            self.term = term
+            self._entries = fresh._entries
+            self._course_names = fresh._course_names
+            self._tokens = fresh._tokens
+        self.failed = fresh.failed
+        return self
+
+    def refresh(self, api, courses: Iterable[Course]):
+        """
+        Re-crawl only the given courses, leaving the rest of the index untouched.
+        A course whose fetch fails keeps its previous entries and is listed in `failed`.
+        """
+        self.failed = []
+        for course in courses:
+            try:
+                self._index_course(api, course)
+            except Exception as e:
+                print(f"Error indexing course {course.id}: {e}")
+                self.failed.append(course)
+        self._rebuild_tokens()
+        return self
+
+    def course(self, course_id: str) -> Optional[Course]:
+        """ The indexed Course with this id, if any instructor teaches it """
+        for key in self._course_names.get(course_id, ()):
+            entry = self._entries.get(key)
+            if entry is not None and course_id in entry.courses:
+                return entry.courses[course_id]
+        return None
+
+    def _index_course(self, api, course: Course):
+        course_name = '{} {}'.format(course.subject_id, course.course_number)
+        # strict, so a bad response raises before the course's old entries are dropped
+        sections = api.get_sections(course.id, course_name=course_name, strict=True)
+        with self._lock:
+            self._drop_course(course.id)
+            names = set()
+            for section in sections:
+                for instructor in section.instructors or []:
+                    key = normalize_name(instructor)
+                    if not key:
+                        continue
+                    entry = self._entries.get(key)
+                    if entry is None:
+                        entry = self._entries[key] = InstructorEntry(name=instructor)
+                    entry.courses[course.id] = course
+                    entry.sections[section.id] = section
+                    names.add(key)
+            self._course_names[course.id] = names
+
+    def _drop_course(self, course_id: str):
+        for key in self._course_names.pop(course_id, ()):
+            entry = self._entries.get(key)
+            if entry is None:
+                continue
+            entry.courses.pop(course_id, None)
+            for section_id in [s.id for s in entry.sections.values() if s.course_id == course_id]:
+                del entry.sections[section_id]
+            if not entry.courses:
+                del self._entries[key]
+
+    def _rebuild_tokens(self):
+        with self._lock:
+            tokens = set()
+            for key in self._entries:
+                tokens.add((key, key))
+                for token in key.split():
+                    tokens.add((token, key))
+            self._tokens = sorted(tokens)
+
+    def get(self, name: str) -> Optional[InstructorEntry]:
+        return self._entries.get(normalize_name(name))
+
+    def prefix(self, prefix: str, limit=20) -> List[InstructorEntry]:
+        prefix = normalize_name(prefix)
+        if not prefix:
+            return []
+        tokens = self._tokens
+        keys = []
+        i = bisect.bisect_left(tokens, (prefix, ''))
+        while i < len(tokens) and tokens[i][0].startswith(prefix) and len(keys) < limit:
+            if tokens[i][1] not in keys:
+                keys.append(tokens[i][1])
+            i += 1
+        return [self._entries[key] for key in keys if key in self._entries]
+
+    def fuzzy(self, name: str, limit=5, cutoff=0.6) -> List[InstructorEntry]:
+        keys = difflib.get_close_matches(normalize_name(name), list(self._entries), n=limit, cutoff=cutoff)
+        return [self._entries[key] for key in keys]
+
+    def lookup(self, name: str, limit=5) -> List[InstructorEntry]:
+        """ Exact match first, then prefix matches, then fuzzy matches """
+        entry = self.get(name)
+        if entry is not None:
+            return [entry]
+        return self.prefix(name, limit=limit) or self.fuzzy(name, limit=limit)
+
+    def save(self, path: str):
+        with self._lock:
+            data = {
+                'term': asdict(self.term) if self.term else None,
+                'courses': {},
+                'sections': {},
+            }
+            for entry in self._entries.values():
+                for course in entry.courses.values():
+                    data['courses'][course.id] = {
+                        'id': course.id,
+                        'subject_id': course.subject_id,
+                        'course_number': course.course_number,
+                        'title': course.title,
+                    }
+                for section in entry.sections.values():
+                    data['sections'][section.id] = asdict(section)
+        # write then rename, so processes reloading on mtime never read a partial file
+        tmp_path = '{}.{}.tmp'.format(path, os.getpid())
+        with open(tmp_path, 'w') as f:
+            json.dump(data, f, default=lambda value: value.isoformat())
+        os.replace(tmp_path, path)
+        self.path = path
+        self._mtime = os.stat(path).st_mtime
+
+    def load(self, path: str):
+        mtime = os.stat(path).st_mtime
+        with open(path) as f:
+            data = json.load(f)
+
+        term = Term(**data['term']) if data['term'] else None
+        entries = {}
+        course_names = {}
+        courses = {}
+        for course_id, course_data in data['courses'].items():
+            courses[course_id] = Course(**course_data, term=term)
+        for section_data in data['sections'].values():
+            for key in ('start_date', 'end_date'):
+                section_data[key] = date.fromisoformat(section_data[key])
+            for key in ('start_time', 'end_time'):
+                section_data[key] = time.fromisoformat(section_data[key])
+            section = Section(**section_data)
+            course = courses.get(section.course_id)
+            for instructor in section.instructors or []:
+                key = normalize_name(instructor)
+                if not key or course is None:
+                    continue
+                entry = entries.get(key)
+                if entry is None:
+                    entry = entries[key] = InstructorEntry(name=instructor)
+                entry.courses[course.id] = course
+                entry.sections[section.id] = section
+                course_names.setdefault(course.id, set()).add(key)
+        with self._lock:
+            self.term = term
+            self._entries = entries
+            self._course_names = course_names
+        self.path = path
+        self._mtime = mtime
+        self._rebuild_tokens()
+        return self
+
+    def reload_if_changed(self) -> bool:
+        """ Pick up a build or refresh saved by another process """
+        if not self.path:
+            return False
+        try:
+            if os.stat(self.path).st_mtime == self._mtime:
+                return False
+            self.load(self.path)
+            return True
+        except FileNotFoundError:
+            # not built yet
+            return False
+        except (OSError, ValueError) as e:
+            print(f"Error reloading instructor index {self.path}: {e}")
+            return False
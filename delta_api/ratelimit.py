@@ -0,0 +1,183 @@
+import contextlib
+import threading
+import time
+from collections import deque
+from typing import Dict, Optional
+
+INTERACTIVE = 'interactive'
+BACKGROUND = 'background'
+# highest priority first
+LANES = (INTERACTIVE, BACKGROUND)
+
+_local = threading.local()
+
+
+def current_lane() -> str:
+    return getattr(_local, 'lane', INTERACTIVE)
+
+@contextlib.contextmanager
+def lane(name: str):
+    """ Tag every upstream request made by this thread inside the block with a lane """
+    if name not in LANES:
+        raise ValueError('Unknown lane {!r}'.format(name))
+    previous = current_lane()
+    _local.lane = name
+    try:
+        yield
+    finally:
+        _local.lane = previous
+
+class SchedulerFull(Exception):
+    pass
+
+
+class TokenBucket:
+    """ Blocking token bucket: `rate` requests per second with bursts up to `burst` """
+    def __init__(self, rate: float, burst: float=1):
+        self.rate = rate
+        self.burst = burst
+        self._tokens = burst
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def __repr__(self):
+        return '<TokenBucket {}/s>'.format(self.rate)
+
+    def _refill(self, now: float):
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def try_acquire(self) -> bool:
+        with self._lock:
+            self._refill(time.monotonic())
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return True
+            return False
+
+    def acquire(self):
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._refill(now)
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+    def report(self, elapsed: float, ok: bool):
+        pass
+
+class Scheduler:
+    """
+    Token bucket shared by every lane, handing tokens to interactive requests
+    before background ones. Each lane also has its own budget (a share of the
+    rate) and a queue-depth limit. Upstream errors or slow responses halve the
+    rate, and it recovers gradually as requests succeed again.
+    """
+    def __init__(self, rate: float=10.0, burst: float=10,
+                 budgets: Optional[Dict[str, float]]=None,
+                 max_queue: Optional[Dict[str, int]]=None,
+                 slow_threshold: float=2.0, min_factor: float=0.1):
+        self.rate = rate
+        # below one token nothing could ever be granted
+        self.burst = max(1.0, burst)
+        self.budgets = dict({INTERACTIVE: 1.0, BACKGROUND: 0.5}, **(budgets or {}))
+        for name, share in self.budgets.items():
+            if name not in LANES:
+                raise ValueError('Unknown lane {!r}'.format(name))
+            if share <= 0:
+                raise ValueError('Budget for {} must be positive, got {}'.format(name, share))
+        if rate <= 0 or burst <= 0:
+            raise ValueError('rate and burst must be positive')
+        self.max_queue = dict({INTERACTIVE: 200, BACKGROUND: 50}, **(max_queue or {}))
+        self.slow_threshold = slow_threshold
+        self.min_factor = min_factor
+        # multiplier on rate, lowered while upstream is struggling
+        self.factor = 1.0
+
+        self._cond = threading.Condition()
+        self._updated = time.monotonic()
+        self._tokens = self.burst
+        self._lane_tokens = {name: self._lane_capacity(name) for name in LANES}
+        self._queues = {name: deque() for name in LANES}
+        self._stats = {name: {'granted': 0, 'rejected': 0, 'waits': deque(maxlen=1000)} for name in LANES}
+
+    def __repr__(self):
+        return '<Scheduler {}/s x{:.2f}>'.format(self.rate, self.factor)
+
+    def _lane_capacity(self, name: str) -> float:
+        # a lane must be able to hold one whole token or it can never be granted one
+        return max(1.0, self.burst * self.budgets[name])
+
+    def _refill(self):
+        now = time.monotonic()
+        elapsed = now - self._updated
+        self._updated = now
+        rate = self.rate * self.factor
+        self._tokens = min(self.burst, self._tokens + elapsed * rate)
+        for name in LANES:
+            share = self.budgets[name]
+            self._lane_tokens[name] = min(self._lane_capacity(name), self._lane_tokens[name] + elapsed * rate * share)
+
+    def _next_token_in(self, name: str) -> float:
+        rate = self.rate * self.factor
+        wait = max(1 - self._tokens, 1 - self._lane_tokens[name], 0) / (rate * min(1.0, self.budgets[name]))
+        return max(wait, 0.001)
+
+    def _my_turn(self, name: str, ticket) -> bool:
+        for other in LANES:
+            if other == name:
+                return self._queues[name][0] is ticket
+            if self._queues[other]:
+                return False
+        return False
+
+    def acquire(self, name: Optional[str]=None):
+        name = name or current_lane()
+        ticket = object()
+        started = time.monotonic()
+        with self._cond:
+            queue = self._queues[name]
+            if len(queue) >= self.max_queue[name]:
+                self._stats[name]['rejected'] += 1
+                raise SchedulerFull('Too many queued {} requests'.format(name))
+            queue.append(ticket)
+            try:
+                while True:
+                    self._refill()
+                    if self._my_turn(name, ticket) and self._tokens >= 1 and self._lane_tokens[name] >= 1:
+                        self._tokens -= 1
+                        self._lane_tokens[name] -= 1
+                        break
+                    self._cond.wait(self._next_token_in(name))
+            finally:
+                queue.remove(ticket)
+                self._cond.notify_all()
+            stats = self._stats[name]
+            stats['granted'] += 1
+            stats['waits'].append(time.monotonic() - started)
+
+    def report(self, elapsed: float, ok: bool):
+        with self._cond:
+            if not ok or elapsed > self.slow_threshold:
+                self.factor = max(self.min_factor, self.factor / 2)
+            else:
+                self.factor = min(1.0, self.factor + 0.05)
+
+    def metrics(self) -> dict:
+        with self._cond:
+            lanes = {}
+            for name in LANES:
+                stats = self._stats[name]
+                waits = sorted(stats['waits'])
+                lanes[name] = {
+                    'queued': len(self._queues[name]),
+                    'granted': stats['granted'],
+                    'rejected': stats['rejected'],
+                    'wait_p50': waits[len(waits) // 2] if waits else 0.0,
+                    'wait_p95': waits[int(len(waits) * 0.95)] if waits else 0.0,
+                    'wait_max': waits[-1] if waits else 0.0,
+                }
+            return {'rate': self.rate, 'factor': self.factor, 'lanes': lanes}
@@ -0,0 +1,171 @@
+import sys
+from typing import Dict, Hashable, Iterable, Iterator, List, Optional
+
+from delta_api.models import Section
+
+# fields whose values repeat across most of a term and are shared through the pool
+POOLED = ('instructors', 'instruction_mode', 'careers', 'campus', 'component', 'room', 'building',
+          'days', 'start_date', 'end_date', 'start_time', 'end_time', 'course_name', 'course_id')
+FIELDS = ('id', 'section_number', 'open_seats', 'total_seats', 'free_textbook', 'low_cost_textbook') + POOLED
+
+
+def deep_getsizeof(*objects) -> int:
+    """ Bytes held by `objects` and everything they reference, counting shared objects once """
+    seen = set()
+    stack = list(objects)
+    total = 0
+    while stack:
+        obj = stack.pop()
+        if id(obj) in seen:
+            continue
+        seen.add(id(obj))
+        total += sys.getsizeof(obj)
+        if isinstance(obj, dict):
+            stack.extend(obj.keys())
+            stack.extend(obj.values())
+        elif isinstance(obj, (list, tuple, set, frozenset)):
+            stack.extend(obj)
+        if hasattr(obj, '__dict__'):
+            stack.append(obj.__dict__)
+        for slot in getattr(type(obj), '__slots__', ()):
+            if hasattr(obj, slot):
+                stack.append(getattr(obj, slot))
+    return total
+
+class SectionRecord:
+    """ Slotted, read-mostly copy of a Section whose repeated values live in a shared pool """
+    __slots__ = FIELDS
+
+    def __init__(self, **values):
+        for name in FIELDS:
+            setattr(self, name, values[name])
+
+    def __repr__(self):
+        return '<SectionRecord {}>'.format(self.section_number)
+
+    def is_full(self) -> bool:
+        return self.open_seats < 1
+
+    def is_open(self) -> bool:
+        return self.open_seats > 0
+
+    def to_section(self) -> Section:
+        values = {name: getattr(self, name) for name in FIELDS}
+        values['instructors'] = list(self.instructors) if self.instructors is not None else None
+        values['careers'] = list(self.careers)
+        return Section(**values)
+
+class SectionStore:
+    """
+    Compact in-memory store for a term's worth of sections, indexed by section
+    id, course id and registration number. Strings, instructor and career lists,
+    dates and times are deduplicated so each distinct value is held once.
+    """
+    def __init__(self, sections: Iterable[Section]=()):
+        self._pool: Dict[Hashable, Hashable] = {}
+        self._by_id: Dict[str, SectionRecord] = {}
+        self._by_course: Dict[Optional[str], List[SectionRecord]] = {}
+        self._by_number: Dict[int, SectionRecord] = {}
+        self.extend(sections)
+
+    def __repr__(self):
+        return '<SectionStore {} sections>'.format(len(self._by_id))
+
+    def __len__(self):
+        return len(self._by_id)
+
+    def __iter__(self) -> Iterator[SectionRecord]:
+        return iter(self._by_id.values())
+
+    def __contains__(self, section_id):
+        return section_id in self._by_id
+
+    def _shared(self, value):
+        if value is None:
+            return None
+        return self._pool.setdefault(value, value)
+
+    def add(self, section: Section, course_id: Optional[str]=None) -> SectionRecord:
+        """ Insert or replace one section, optionally filing it under `course_id` """
+        values = {name: getattr(section, name) for name in FIELDS}
+        if course_id is not None:
+            values['course_id'] = course_id
+        if values['instructors'] is not None:
+            values['instructors'] = tuple(values['instructors'])
+        values['careers'] = tuple(values['careers'] or ())
+        for name in POOLED:
+            values[name] = self._shared(values[name])
+        record = SectionRecord(**values)
+
+        if record.id in self._by_id:
+            self._unindex(self._by_id[record.id])
+        self._by_id[record.id] = record
+        self._by_course.setdefault(record.course_id, []).append(record)
+        self._by_number[record.section_number] = record
+        return record
+
+    def extend(self, sections: Iterable[Section]):
+        for section in sections:
+            self.add(section)
+
+    def _unindex(self, record: SectionRecord):
+        del self._by_id[record.id]
+        course = self._by_course.get(record.course_id)
+        if course is not None:
+            course.remove(record)
+            if not course:
+                del self._by_course[record.course_id]
+        if self._by_number.get(record.section_number) is record:
+            del self._by_number[record.section_number]
+
+    def replace_course(self, course_id: str, sections: Iterable[Section]):
+        """ Swap in a fresh fetch of one course's sections, dropping ones that disappeared """
+        for record in list(self._by_course.get(course_id, ())):
+            self._unindex(record)
+        for section in sections:
+            self.add(section, course_id)
+
+    def update_seats(self, section_id: str, open_seats: int, total_seats: Optional[int]=None) -> bool:
+        record = self._by_id.get(section_id)
+        if record is None:
+            return False
+        record.open_seats = open_seats
+        if total_seats is not None:
+            record.total_seats = total_seats
+        return True
+
+    def get(self, section_id: str) -> Optional[SectionRecord]:
+        return self._by_id.get(section_id)
+
+    def by_course(self, course_id: str) -> List[SectionRecord]:
+        return list(self._by_course.get(course_id, ()))
+
+    def by_number(self, section_number: int) -> Optional[SectionRecord]:
+        return self._by_number.get(int(section_number))
+
+    def compact(self):
+        """ Drop pooled values no longer referenced by any record """
+        used = {}
+        for record in self._by_id.values():
+            for name in POOLED:
+                value = getattr(record, name)
+                if value is not None:
+                    used[value] = value
+        self._pool = used
+
+    def memory_footprint(self) -> dict:
+        """ Approximate bytes held by the records, the indexes and the shared values """
+        records = deep_getsizeof(list(self._by_id.values()))
+        indexes = (
+            sys.getsizeof(self._by_id) + sys.getsizeof(self._by_number) + sys.getsizeof(self._by_course)
+            + sum(sys.getsizeof(course) for course in self._by_course.values())
+        )
+        pool = sys.getsizeof(self._pool)
+        return {
+            'sections': len(self._by_id),
+            'distinct_values': len(self._pool),
+            'records': records,
+            'indexes': indexes,
+            'pool': pool,
+            'total': records + indexes + pool,
+        }
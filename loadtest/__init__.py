@@ -0,0 +1,2 @@
+from loadtest.harness import LoadTest
+from loadtest.stub import StubGraphQLServer
@@ -0,0 +1,37 @@
+import argparse
+
+from loadtest.harness import DEFAULT_MIX, LoadTest, parse_mix
+from loadtest.stub import StubGraphQLServer
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        prog='python -m loadtest',
+        description='Drive the Flask app with virtual users against a local GraphQL stub.'
+    )
+    parser.add_argument('--users', type=int, default=20, help='concurrent virtual users')
+    parser.add_argument('--duration', type=float, default=30.0, help='seconds to run')
+    parser.add_argument('--think-time', type=float, default=0.0, help='mean seconds between a user\'s requests')
+    parser.add_argument('--mix', type=parse_mix, default=DEFAULT_MIX,
+                        help='action weights, e.g. login=1,search=3,course=4,section=4')
+    parser.add_argument('--latency', type=float, default=0.05, help='mean stub response time in seconds')
+    parser.add_argument('--jitter', type=float, default=0.02, help='stub response time standard deviation')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='fraction of stub responses that are GraphQL errors')
+    parser.add_argument('--courses', type=int, default=200)
+    parser.add_argument('--sections-per-course', type=int, default=30)
+    args = parser.parse_args()
+
+    stub = StubGraphQLServer(
+        latency=args.latency,
+        jitter=args.jitter,
+        error_rate=args.error_rate,
+        courses=args.courses,
+        sections_per_course=args.sections_per_course,
+    )
+    load_test = LoadTest(users=args.users, duration=args.duration, mix=args.mix,
+                         think_time=args.think_time, stub=stub)
+    print(load_test.run().report())
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,173 @@
+import os
+import random
+import re
+import tempfile
+import threading
+import time
+from collections import defaultdict
+from typing import Dict, List, Optional
+
+import requests
+from werkzeug.serving import WSGIRequestHandler, make_server
+
+from config import Config
+from loadtest.stub import StubGraphQLServer
+
+# relative weight of each action a virtual user picks between requests
+DEFAULT_MIX = {'login': 1, 'search': 3, 'course': 4, 'section': 4}
+PASSWORD = 'loadtest'
+
+
+def percentile(values: List[float], pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(0, min(len(ordered) - 1, int(round(pct / 100 * len(ordered))) - 1))
+    return ordered[rank]
+
+class QuietRequestHandler(WSGIRequestHandler):
+    def log_request(self, *args, **kwargs):
+        pass
+
+class LoadTestConfig(Config):
+    WTF_CSRF_ENABLED = False
+    SQLALCHEMY_DATABASE_URI = 'sqlite:///' + os.path.join(tempfile.gettempdir(), 'delta_tools_loadtest.db')
+    # keep the stub's responses and timings away from the real deployment's cache, index and limits
+    DELTA_CACHE_PATH = None
+    UPSTREAM_RATE = None
+    WARMUP_ON_START = False
+    WARMUP_REFRESH_INTERVAL = 0
+    INSTRUCTOR_INDEX_PATH = None
+    PROFILE_TOKEN = None
+    PROFILE_SAMPLE_RATE = 0.0
+
+class LoadTest:
+    """
+    Serves the Flask app on a local port against a StubGraphQLServer and drives
+    it with virtual users, recording latency per route.
+    """
+    def __init__(self, users=20, duration=30.0, mix: Optional[Dict[str, int]]=None, think_time=0.0,
+                 stub: Optional[StubGraphQLServer]=None, config_class=LoadTestConfig):
+        self.users = users
+        self.duration = duration
+        self.mix = mix or DEFAULT_MIX
+        self.think_time = think_time
+        self.stub = stub or StubGraphQLServer()
+        self.config_class = config_class
+        self.latencies = defaultdict(list)
+        self.errors = defaultdict(int)
+        self._lock = threading.Lock()
+        self.base_url = None
+        self.elapsed = 0.0
+
+    def _setup_app(self):
+        from app import create_app, db, delta_api
+        from app.models import User
+
+        delta_api.url = self.stub.url
+        app = create_app(self.config_class)
+        with app.app_context():
+            db.drop_all()
+            db.create_all()
+            for i in range(self.users):
+                user = User(username='user{}'.format(i), email='user{}@example.com'.format(i))
+                user.set_password(PASSWORD)
+                db.session.add(user)
+            db.session.commit()
+        return app
+
+    def _record(self, route: str, started: float, response: Optional[requests.Response]):
+        elapsed = time.perf_counter() - started
+        with self._lock:
+            if response is None or response.status_code >= 400:
+                self.errors[route] += 1
+            else:
+                self.latencies[route].append(elapsed)
+
+    def _call(self, route: str, session: requests.Session, method: str, path: str, **kwargs):
+        started = time.perf_counter()
+        try:
+            response = session.request(method, self.base_url + path, allow_redirects=False, timeout=60, **kwargs)
+        except requests.RequestException:
+            response = None
+        self._record(route, started, response)
+        return response
+
+    def _virtual_user(self, i: int, deadline: float):
+        rng = random.Random(i)
+        session = requests.Session()
+        username = 'user{}'.format(i)
+        actions = list(self.mix)
+        weights = [self.mix[action] for action in actions]
+        logged_in = False
+
+        while time.monotonic() < deadline:
+            action = rng.choices(actions, weights)[0]
+            if action == 'login' or (action == 'search' and not logged_in):
+                self._call('main.logout', session, 'GET', '/logout')
+                response = self._call('main.login', session, 'POST', '/login',
+                                      data={'username': username, 'password': PASSWORD})
+                logged_in = response is not None and response.status_code == 302
+            elif action == 'search':
+                course = rng.choice(self.stub.courses)
+                self._call('main.index', session, 'POST', '/index', data={'query': course['subject']['id']})
+            elif action == 'course':
+                course = rng.choice(self.stub.courses)
+                self._call('main.courses', session, 'GET', '/courses/{}'.format(course['id']))
+            elif action == 'section':
+                course = rng.choice(self.stub.courses)
+                section = rng.choice(self.stub.sections[course['id']])
+                self._call('main.sections', session, 'GET',
+                           '/courses/{}/sections/{}'.format(course['id'], section['id']))
+            if self.think_time:
+                time.sleep(rng.expovariate(1 / self.think_time))
+
+    def run(self):
+        with self.stub:
+            app = self._setup_app()
+            server = make_server('127.0.0.1', 0, app, threaded=True, request_handler=QuietRequestHandler)
+            self.base_url = 'http://127.0.0.1:{}'.format(server.server_port)
+            server_thread = threading.Thread(target=server.serve_forever, daemon=True)
+            server_thread.start()
+            try:
+                started = time.monotonic()
+                deadline = started + self.duration
+                users = [threading.Thread(target=self._virtual_user, args=(i, deadline)) for i in range(self.users)]
+                for user in users:
+                    user.start()
+                for user in users:
+                    user.join()
+                self.elapsed = time.monotonic() - started
+            finally:
+                server.shutdown()
+        return self
+
+    def report(self) -> str:
+        lines = ['{} virtual users, {:.1f}s, {} upstream requests'.format(self.users, self.elapsed, self.stub.requests)]
+        lines.append('{:<14} {:>8} {:>7} {:>9} {:>9} {:>9} {:>9}'.format(
+            'route', 'requests', 'errors', 'req/s', 'p50 ms', 'p95 ms', 'p99 ms'))
+        for route in sorted(set(self.latencies) | set(self.errors)):
+            values = self.latencies[route]
+            lines.append('{:<14} {:>8} {:>7} {:>9.1f} {:>9.1f} {:>9.1f} {:>9.1f}'.format(
+                route,
+                len(values),
+                self.errors[route],
+                len(values) / self.elapsed if self.elapsed else 0.0,
+                percentile(values, 50) * 1000,
+                percentile(values, 95) * 1000,
+                percentile(values, 99) * 1000,
+            ))
+        total = sum(len(values) for values in self.latencies.values())
+        lines.append('total {} requests, {:.1f} req/s'.format(total, total / self.elapsed if self.elapsed else 0.0))
+        return '\n'.join(lines)
+
+
+def parse_mix(value: str) -> Dict[str, int]:
+    """ 'login=1,search=3,course=4,section=4' """
+    mix = {}
+    for part in value.split(','):
+        match = re.fullmatch(r'\s*(\w+)\s*=\s*(\d+)\s*', part)
+        if not match or match.group(1) not in DEFAULT_MIX:
+            raise ValueError('Invalid mix entry: {!r}'.format(part))
+        mix[match.group(1)] = int(match.group(2))
+    return mix
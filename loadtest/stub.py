@@ -0,0 +1,181 @@
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from delta_api.cache import operation_name
+
+SUBJECTS = ['MATH', 'ENGL', 'BIOL', 'CHEM', 'HIST', 'PSYC', 'CIS', 'ART', 'MUS', 'PHYS']
+INSTRUCTORS = ['Smith, John', 'Garcia, Maria', 'Nguyen, Anh', 'Johnson, Lee', 'Patel, Priya',
+               'Brown, Chris', 'Lopez, Ana', 'Kim, Min', 'Williams, Dana', 'Davis, Sam']
+CAMPUSES = ['Stockton', 'South Campus at Mountain House', 'Online']
+COMPONENTS = ['Lecture', 'Laboratory', 'Lecture/Lab']
+MODES = ['In Person', 'Online', 'Hybrid']
+DAYS = ['MW', 'TTh', 'MWF', 'F', '']
+
+
+class StubGraphQLServer:
+    """
+    Local stand-in for api.collegescheduler.com serving deterministic
+    payloads shaped like the real ones, with configurable latency and errors.
+    """
+    def __init__(self, host='127.0.0.1', port=0, latency=0.05, jitter=0.02, error_rate=0.0,
+                 courses=200, sections_per_course=30, seed=0):
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.requests = 0
+        self._lock = threading.Lock()
+        self._random = random.Random(seed)
+        self.term = {'code': '202630', 'name': 'Fall 2026', 'id': 'VGVybToyMDI2MzA='}
+        self.courses = self._make_courses(courses)
+        self.sections = {course['id']: self._make_sections(course, sections_per_course) for course in self.courses}
+
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                body = json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+                status, payload = stub.handle(body['query'], body.get('variables') or {})
+                data = json.dumps(payload).encode()
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, format, *args):
+                pass
+
+        self._server = ThreadingHTTPServer((host, port), Handler)
+        self._server.daemon_threads = True
+        self._thread = None
+
+    def __repr__(self):
+        return '<StubGraphQLServer {}>'.format(self.url)
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return 'http://{}:{}/graphql'.format(host, port)
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def _make_courses(self, count):
+        courses = []
+        for i in range(count):
+            subject = SUBJECTS[i % len(SUBJECTS)]
+            number = str(1 + i // len(SUBJECTS) * 3)
+            courses.append({
+                'id': 'Q291cnNlOj{:06d}'.format(i),
+                'subject': {'id': subject},
+                'courseNumber': number,
+                'title': '{} Topics {}'.format(subject.title(), number),
+                'term': {'code': self.term['code'], 'id': self.term['id']},
+            })
+        return courses
+
+    def _make_sections(self, course, count):
+        sections = []
+        for i in range(count):
+            total = self._random.choice([24, 30, 35, 40, 45])
+            start = self._random.choice([800, 930, 1100, 1230, 1400, 1800])
+            sections.append({
+                'id': 'U2VjdGlvbj{}{:03d}'.format(course['id'][-6:], i),
+                'registrationNumber': str(30000 + len(self.courses) * i + int(course['id'][-6:])),
+                'instructors': [self._random.choice(INSTRUCTORS)] if self._random.random() > 0.1 else [],
+                'instructionMode': self._random.choice(MODES),
+                'careers': ['Credit'],
+                'openSeats': self._random.randint(0, total),
+                'totalSeats': total,
+                'campus': self._random.choice(CAMPUSES),
+                'location': None,
+                'component': self._random.choice(COMPONENTS),
+                'freeTextbookAvailable': self._random.random() < 0.2,
+                'lowCostTextbookAvailable': self._random.random() < 0.4,
+                'meetings': [{
+                    'room': str(self._random.randint(100, 299)),
+                    'building': None,
+                    'buildingCode': self._random.choice(['SH', 'HOLT', 'GOLD', 'DLTA']),
+                    'buildingDescription': None,
+                    'days': self._random.choice(DAYS),
+                    'startDate': '2026-08-17',
+                    'endDate': '2026-12-12',
+                    'startTime': start,
+                    'endTime': start + 115,
+                }],
+                '__typename': 'SearchSection',
+            })
+        return sections
+
+    def handle(self, query: str, variables: dict):
+        with self._lock:
+            self.requests += 1
+            delay = max(0.0, self._random.gauss(self.latency, self.jitter))
+            fail = self._random.random() < self.error_rate
+        time.sleep(delay)
+        if fail:
+            return 200, {'errors': [{'message': 'Upstream stub error'}]}
+
+        name = operation_name(query)
+        handler = getattr(self, '_' + name, None)
+        if handler is None:
+            return 400, {'errors': [{'message': 'Unknown operation {}'.format(name)}]}
+        return 200, {'data': handler(variables)}
+
+    def _routes_Landing_Query(self, variables):
+        return {'environment': {'id': 'env', 'courseSearchTerms': [self.term]}}
+
+    def _routes_CourseContainer_Query(self, variables):
+        course = next((c for c in self.courses if c['id'] == variables['courseId']), None)
+        return {'course': dict(course, __typename='SearchCourse') if course else None}
+
+    def _SearchAutoCompleteQuery_Query(self, variables):
+        prefix = variables['prefix'].upper()
+        matches = [
+            {'courseId': c['id'], 'subjectId': c['subject']['id'], 'courseNumber': c['courseNumber'], 'title': c['title']}
+            for c in self.courses
+            if '{} {}'.format(c['subject']['id'], c['courseNumber']).startswith(prefix) or prefix in c['title'].upper()
+        ]
+        return {'environment': {'id': 'env', 'courses': matches[:variables.get('size') or 100]}}
+
+    def _CourseDetailsQuery_Query(self, variables):
+        sections = self.sections.get(variables['courseId'], [])
+        edges = [{'cursor': section['id'], 'node': section} for section in sections[:variables.get('count') or 100]]
+        return {'environment': {'id': 'env', 'getCourseSections': {
+            'totalSections': len(sections),
+            'pageInfo': {'hasNextPage': False, 'endCursor': None},
+            'edges': edges,
+        }}}
+
+    def _routes_SectionContainer_Query(self, variables):
+        section = next((s for s in self.sections.get(variables['courseId'], []) if s['id'] == variables['sectionId']), None)
+        return {'environment': {'id': 'env'}, 'course': None, 'section': section}
+
+    def _routes_InstructorCourses_Query(self, variables):
+        names = [value for facet in variables.get('facets') or [] for value in facet['selectedFilterValues']]
+        courses = [
+            c for c in self.courses
+            if not names or any(set(names) & set(s['instructors']) for s in self.sections[c['id']])
+        ]
+        start = int(variables['cursor']) if variables.get('cursor') else 0
+        count = variables.get('count') or 100
+        page = courses[start:start + count]
+        return {'environment': {'id': 'env', 'findCourses': {
+            'pageInfo': {'hasNextPage': start + count < len(courses), 'endCursor': str(start + count)},
+            'edges': [{'cursor': c['id'], 'node': dict(c, __typename='SearchCourse')} for c in page],
+        }}}
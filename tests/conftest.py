@@ -0,0 +1,28 @@
+import pytest
+
+
+@pytest.fixture
+def app():
+    config = pytest.importorskip('config')
+    from app import create_app, db
+
+    class TestConfig(config.Config):
+        TESTING = True
+        WTF_CSRF_ENABLED = False
+        SQLALCHEMY_DATABASE_URI = 'sqlite://'
+        JINJA_BYTECODE_CACHE_DIR = None
+        DELTA_CACHE_PATH = None
+        UPSTREAM_RATE = None
+        SNAPSHOT_REFRESH_INTERVAL = 0
+        WARMUP_ON_START = False
+        WARMUP_REFRESH_INTERVAL = 0
+        INSTRUCTOR_INDEX_PATH = None
+        PROFILE_TOKEN = None
+        PROFILE_SAMPLE_RATE = 0.0
+
+    app = create_app(TestConfig)
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+        db.drop_all()
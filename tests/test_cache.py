@@ -0,0 +1,42 @@
+import time
+
+from delta_api.cache import SQLiteCache
+
+QUERY = 'query CourseDetailsQuery_Query { course }'
+
+
+def counter():
+    calls = []
+
+    def fetch():
+        calls.append(1)
+        return {'call': len(calls)}
+    return fetch, calls
+
+
+def test_fetch_reuses_unexpired_response(tmp_path):
+    cache = SQLiteCache(str(tmp_path / 'cache.db'), ttls={'CourseDetailsQuery_Query': 60})
+    fetch, calls = counter()
+    cache.fetch(QUERY, {}, fetch)
+    assert cache.fetch(QUERY, {}, fetch) == {'call': 1}
+    assert len(calls) == 1
+
+
+def test_min_ttl_refetches_responses_about_to_expire(tmp_path, monkeypatch):
+    cache = SQLiteCache(str(tmp_path / 'cache.db'), ttls={'CourseDetailsQuery_Query': 60})
+    fetch, calls = counter()
+    cache.fetch(QUERY, {}, fetch)
+    now = time.time()
+    monkeypatch.setattr(time, 'time', lambda: now + 40)
+    # 20s left: kept for a caller needing 10s, refetched for one needing 30s
+    assert cache.fetch(QUERY, {}, fetch, min_ttl=10) == {'call': 1}
+    assert cache.fetch(QUERY, {}, fetch, min_ttl=30) == {'call': 2}
+
+
+def test_min_ttl_reuses_a_response_just_refreshed(tmp_path):
+    cache = SQLiteCache(str(tmp_path / 'cache.db'), ttls={'CourseDetailsQuery_Query': 60})
+    fetch, calls = counter()
+    cache.fetch(QUERY, {}, fetch, min_ttl=300)
+    # another worker warming every 300s finds it stored moments ago
+    assert cache.fetch(QUERY, {}, fetch, min_ttl=300) == {'call': 1}
+    assert len(calls) == 1
@@ -0,0 +1,7 @@
+def test_breadcrumb_streams_before_the_course_name(app, monkeypatch):
+    from app import delta_api
+    monkeypatch.setattr(delta_api, 'get_course_name', lambda course_id: 'MATH </script> 1')
+    monkeypatch.setattr(delta_api, 'get_sections', lambda course_id, course_name=None, **kwargs: [])
+    page = app.test_client().get('/courses/c1').get_data(as_text=True)
+    assert page.index('id="course-name">Loading…') < page.index('<h1>')
+    assert '"MATH \\u003c/script\\u003e 1"' in page
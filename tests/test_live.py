@@ -0,0 +1,20 @@
+import pytest
+
+
+def test_subscribers_capped_per_process(app):
+    from app.live import SeatFeed, TooManyFeeds
+
+    class QuietFeed(SeatFeed):
+        def _fetch(self, key):
+            return {}
+
+    feed = QuietFeed(interval=0.01, max_subscribers=2)
+    first = feed.subscribe(app, ('course', 'c1'))
+    second = feed.subscribe(app, ('course', 'c2'))
+    with pytest.raises(TooManyFeeds):
+        feed.subscribe(app, ('course', 'c1'))
+    feed.unsubscribe(('course', 'c1'), first)
+    third = feed.subscribe(app, ('course', 'c1'))
+    feed.unsubscribe(('course', 'c1'), third)
+    feed.unsubscribe(('course', 'c2'), second)
+    assert feed.subscriber_count() == 0
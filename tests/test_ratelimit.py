@@ -0,0 +1,35 @@
+import threading
+
+import pytest
+
+from delta_api.ratelimit import BACKGROUND, INTERACTIVE, Scheduler
+
+
+def acquire_within(scheduler, name, timeout):
+    done = threading.Event()
+
+    def worker():
+        scheduler.acquire(name)
+        done.set()
+
+    threading.Thread(target=worker, daemon=True).start()
+    return done.wait(timeout)
+
+
+@pytest.mark.parametrize('rate', [0.5, 1, 1.5])
+def test_small_burst_still_grants_background(rate):
+    scheduler = Scheduler(rate, rate)
+    assert acquire_within(scheduler, BACKGROUND, 1.0)
+    assert acquire_within(scheduler, INTERACTIVE, 1.0 / rate + 1.0)
+
+
+def test_small_budget_refills_to_one_token():
+    scheduler = Scheduler(20, 1, budgets={BACKGROUND: 0.1})
+    for _ in range(3):
+        assert acquire_within(scheduler, BACKGROUND, 2.0)
+
+
+@pytest.mark.parametrize('budget', [0, -0.5])
+def test_non_positive_budget_rejected(budget):
+    with pytest.raises(ValueError):
+        Scheduler(1, 1, budgets={BACKGROUND: budget})
@@ -0,0 +1,9 @@
+def test_record_counts_normalized_searches(app):
+    from app import db
+    from app.models import Search
+    Search.record('MATH')
+    Search.record('  math ')
+    db.session.commit()
+    Search.record('Math')
+    db.session.commit()
+    assert db.session.get(Search, 'math').count == 3
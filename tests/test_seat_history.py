@@ -0,0 +1,59 @@
+from datetime import date
+
+import pytest
+
+
+@pytest.fixture
+def seat_history(app):
+    from app import seat_history
+    return seat_history
+
+
+@pytest.mark.parametrize('value', [0, 1, 127, 128, 300, 2 ** 21, 2 ** 35 + 7])
+def test_varint_round_trip(seat_history, value):
+    out = bytearray()
+    seat_history._write_varint(out, value)
+    seat_history._write_varint(out, 5)
+    assert list(seat_history._read_varints(bytes(out))) == [value, 5]
+
+@pytest.mark.parametrize('value', [0, 1, -1, 2, -2, 63, -64, 10 ** 6, -10 ** 6])
+def test_zigzag_round_trip(seat_history, value):
+    encoded = seat_history._zigzag(value)
+    assert encoded >= 0
+    assert seat_history._unzigzag(encoded) == value
+
+def test_history_decodes_recorded_changes(seat_history):
+    from app import db
+    for at, seats in [(1000, 30), (1060, 30), (1120, 28), (1180, 31), (1240, 0)]:
+        seat_history.record('S1', seats, at)
+    db.session.commit()
+    assert seat_history.history('S1', 1000, 1300) == [(1000, 30), (1120, 28), (1180, 31), (1240, 0)]
+
+def test_projection_while_filling(seat_history):
+    from app import db
+    start = 1_700_000_000
+    for i in range(6):
+        seat_history.record('S1', 30 - i * 2, start + i * 3600)
+    db.session.commit()
+    result = seat_history.projection('S1')
+    assert result is not None and result.fills_at is not None
+
+def test_projection_after_trend_decays(seat_history):
+    from app import db
+    start = 1_700_000_000
+    seat_history.record('S1', 30, start)
+    seat_history.record('S1', 29, start + 60)
+    # a week of unchanged polls decays the rate towards (but never to) zero
+    for hour in range(1, 24 * 7):
+        seat_history.record('S1', 29, start + 60 + hour * 3600)
+    db.session.commit()
+    assert seat_history.projection('S1') is None
+
+def test_projection_not_past_end_date(seat_history):
+    from app import db
+    start = 1_700_000_000
+    for i in range(6):
+        seat_history.record('S1', 30 - i, start + i * 3600)
+    db.session.commit()
+    assert seat_history.projection('S1') is not None
+    assert seat_history.projection('S1', end_date=date(2000, 1, 1)) is None
@@ -0,0 +1,46 @@
+from datetime import datetime, timedelta, timezone
+
+
+def watch(*snapshots):
+    from app import db
+    from app.models import User
+    user = User(username='u', email='u@example.com')
+    user.watching.extend(snapshots)
+    db.session.add(user)
+    db.session.commit()
+
+
+def test_one_worker_claims_a_stale_course(app):
+    from app.models import Section
+    from app.snapshots import SnapshotRefresher
+    watch(Section(section_id='s1', course_id='c1'), Section(section_id='s2', course_id='c1'))
+    first, second = SnapshotRefresher(), SnapshotRefresher()
+    first_courses = first.stale_courses()
+    second_courses = second.stale_courses()
+    assert first.claim(first_courses['c1'])
+    assert not second.claim(second_courses['c1'])
+
+
+def test_expired_claim_can_be_retaken(app):
+    from app import db
+    from app.models import Section
+    from app.snapshots import SnapshotRefresher
+    watch(Section(section_id='s1', course_id='c1'))
+    refresher = SnapshotRefresher(claim_timeout=60)
+    assert refresher.claim(refresher.stale_courses()['c1'])
+    snapshot = db.session.get(Section, 1)
+    snapshot.claimed = datetime.now(timezone.utc) - timedelta(seconds=61)
+    db.session.commit()
+    assert refresher.claim(refresher.stale_courses()['c1'])
+
+
+def test_gone_sections_are_rechecked_rarely(app):
+    from app.models import Section
+    from app.snapshots import SnapshotRefresher
+    now = datetime.now(timezone.utc)
+    watch(
+        Section(section_id='live', course_id='c1', refreshed=now - timedelta(hours=1)),
+        Section(section_id='gone', course_id='c2', refreshed=now - timedelta(hours=1), gone=True),
+        Section(section_id='long_gone', course_id='c3', refreshed=now - timedelta(days=2), gone=True),
+    )
+    assert set(SnapshotRefresher(max_age=120).stale_courses()) == {'c1', 'c3'}